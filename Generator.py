@@ -1,32 +1,38 @@
-import sys
 import os
 from Maze import *
+from render import encode
+from algorithms import ALGORITHMS
+
+# Numbering of the interactive prompt; 0 and 1 keep their old meaning.
+GENERATOR_CHOICES = ['Prims', 'DFS'] + [name for name in ALGORITHMS
+                                        if name not in ('Prims', 'DFS')]
+
+
+def open_window(gen, flags=None):
+    from viewer import open_window
+    open_window(gen, flags)
 
 
 class Generator:
-    clock = pygame.time.Clock()
+    clock = None
     maze: Maze
     cell_size: int
     wall_width: int
-    maze_generator: int
-    screen: pygame.display
+    maze_generator: str
+    screen = None
     fps = 100
     with_visuals = False
     is_loaded = False
     running = True
     with_path = False
-    screen_flags = pygame.HIDDEN
+    hidden = True
 
     def __init__(self):
-        pygame.init()
-        self.clock = pygame.time.Clock()
-        sys.setrecursionlimit(100000)
-
         self.maze: Maze
         self.cell_size: int
         self.wall_width: int
-        self.maze_generator: int
-        self.screen: pygame.display
+        self.maze_generator: str
+        self.screen = None
         self.fps = 100
         self.with_visuals = False
         self.is_loaded = False
@@ -34,54 +40,30 @@ class Generator:
         self.with_path = False
         # init_maze(self)
 
-    def web_init(self, radius, cell_size, wall_width, gen_algo):
-        sys.setrecursionlimit(100000)
-        self.maze = CircularMaze(radius)
+    def web_init(self, radius, cell_size, wall_width, gen_algo, seed=None):
+        self.maze = CircularMaze(radius, seed)
         self.cell_size = cell_size
         self.wall_width = wall_width
-        self.screen = pygame.display.set_mode(
-            ((radius * 2 - 1) * self.cell_size + wall_width / 2, (radius * 2 - 1) * self.cell_size + wall_width / 2),
-            flags=self.screen_flags)
-        if gen_algo == 'DFS':
-            self.maze_generator = 1
-            self.maze.generate_maze_dfs(self)
-        elif gen_algo == 'Prims':
-            self.maze_generator = 0
-            self.maze.generate_maze_prims(self)
-
-    def dump_maze_image(self, path='maze_images/maze_image.jpg'):
-        self.screen.fill(color=pygame.Color("#808080FF"))
-        draw_maze(self)
-        pygame.image.save(self.screen, path)
+        self.maze_generator = gen_algo
+        self.maze.generate(self, gen_algo, seed=seed)
+
+    def dump_maze_image(self, path='maze_images/maze_image.png'):
+        """Write the maze image; the extension picks png, webp or svg."""
+        image_format = os.path.splitext(path)[1][1:].lower() or 'png'
+        image = self.encode_maze_image(image_format)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(image)
+
+    def encode_maze_image(self, image_format: str = 'png') -> bytes:
+        return encode(self.maze, image_format, self.cell_size,
+                      self.wall_width, self.with_path)
 
     def run(self):
-        while self.running:
-            draw_maze(self)
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_p:
-                        self.with_path = True
-                    if event.key == pygame.K_l:
-                        self.with_path = False
-                    if event.key == pygame.K_r and not self.is_loaded:
-                        self.screen.fill('grey')
-                        init_maze(self)
-                    if event.key == pygame.K_s:
-                        file_name = input('File name: ')
-                        self.maze.save_maze(file_name, self)
-                    if event.key == pygame.K_e:
-                        set_entrance_with_mouse(self)
-                    if event.key == pygame.K_x:
-                        set_exit_with_mouse(self)
-                    if event.key == pygame.K_ESCAPE:
-                        self.running = False
-                if event.type == pygame.QUIT:
-                    self.running = False
-
-            pygame.display.flip()
-            self.clock.tick(20)
-
-def init_circular_maze(maze_generator: int, gen):
+        from viewer import run
+        run(self)
+
+def init_circular_maze(maze_generator: str, gen):
     radius = input('Radius: ')
     if radius == '':
         radius = 15
@@ -94,19 +76,14 @@ def init_circular_maze(maze_generator: int, gen):
     if wall_width == '':
         wall_width = 3
     gen.wall_width = int(wall_width)
-    gen.screen = pygame.display.set_mode(
-        ((radius * 2 - 1) * gen.cell_size, (radius * 2 - 1) * gen.cell_size),
-        flags=gen.screen_flags)
     gen.maze = CircularMaze(radius)
-    if gen.maze_generator == 1:
-        gen.maze.generate_maze_dfs(gen)
-    elif gen.maze_generator == 0:
-        gen.maze.generate_maze_prims(gen)
-    gen.maze.set_exit(random.choice(list(gen.maze.cells.keys())))
+    open_window(gen)
+    gen.maze.generate(gen, gen.maze_generator)
+    gen.maze.set_exit(gen.maze.random.choice(list(gen.maze.cells.keys())))
     gen.maze.calculate_path()
 
 
-def init_rectangular_maze(maze_generator: int, gen):
+def init_rectangular_maze(maze_generator: str, gen):
     length = input('Length: ')
     if length == '':
         length = 30
@@ -124,13 +101,9 @@ def init_rectangular_maze(maze_generator: int, gen):
         wall_width = 3
     gen.wall_width = int(wall_width)
     gen.maze = RectMaze(length, width)
-    gen.screen = pygame.display.set_mode((length * gen.cell_size, width * gen.cell_size),
-                                         flags=gen.screen_flags)
-    if gen.maze_generator == 1:
-        gen.maze.generate_maze_dfs(gen)
-    elif gen.maze_generator == 0:
-        gen.maze.generate_maze_prims(gen)
-    gen.maze.set_exit(random.choice(list(gen.maze.cells.keys())))
+    open_window(gen)
+    gen.maze.generate(gen, gen.maze_generator)
+    gen.maze.set_exit(gen.maze.random.choice(list(gen.maze.cells.keys())))
     gen.maze.calculate_path()
 
 
@@ -139,10 +112,17 @@ def init_maze(gen):
     ans = input('Load maze(y/n): ')
     if ans == 'y':
         gen.maze = Maze.load_maze(input('File name: '), gen)
+        open_window(gen, flags=0)
         gen.is_loaded = True
         return
-    gen.maze_generator = int(input("Maze generator(0: Prim, 1: DFS): "))
     maze_type = int(input('Maze type(0: rectangular, 1: circular): '))
+    shape = ('rectangular', 'circular')[maze_type]
+    # Only offer the generators that can carve this shape.
+    names = [name for name in GENERATOR_CHOICES
+             if shape in ALGORITHMS[name].shapes]
+    choices = ', '.join(f'{number}: {ALGORITHMS[name].label}'
+                        for number, name in enumerate(names))
+    gen.maze_generator = names[int(input(f'Maze generator({choices}): '))]
     with_visuals = input('With visuals?(y/n): ')
     if with_visuals == 'y':
         gen.with_visuals = True
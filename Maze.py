@@ -1,7 +1,10 @@
 import enum
-import json
-from typing import Dict, Tuple, List
-import pygame
+import functools
+import os
+from collections.abc import Mapping, MutableMapping
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, \
+    Set, Tuple
 import random
 
 
@@ -24,20 +27,138 @@ class CellType(int, enum.Enum):
     PATH = 3
 
 
+# Each cell keeps its walls as a 4-bit mask, one bit per direction.
+WALL_BITS = (1, 2, 4, 8)
+ALL_WALLS = 0b1111
+OPPOSITE = (Directions.BOTTOM, Directions.LEFT,
+            Directions.TOP, Directions.RIGHT)
+DIR_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+@functools.lru_cache(maxsize=16)
+def circle_mask(radius: int) -> bytes:
+    side = radius * 2 - 1
+    return bytes(((x - radius + 1) ** 2 + (y - radius + 1) ** 2) < radius ** 2
+                 for y in range(side) for x in range(side))
+
+
+# The order ``Maze.neighbour_indices`` lists neighbours in; generators
+# shuffle or sample that list, so it is part of what a seed reproduces.
+NEIGHBOUR_ORDER = (Directions.TOP, Directions.BOTTOM,
+                   Directions.LEFT, Directions.RIGHT)
+
+
+class GridAdjacency(NamedTuple):
+    """Which neighbours the cells of one grid geometry have.
+
+    ``links[cell]`` is the mask of ``WALL_BITS`` whose direction leads to
+    another cell of the maze; it is 0 for cells outside the mask.
+    ``steps[mask]`` are the index offsets of the directions in ``mask``,
+    in ``NEIGHBOUR_ORDER``, and ``walls[offset]`` is the ``(bit,
+    opposite bit)`` pair a passage to the cell at that offset opens.
+    """
+    links: bytes
+    steps: Tuple[Tuple[int, ...], ...]
+    walls: Dict[int, Tuple[int, int]]
+
+
+@functools.lru_cache(maxsize=16)
+def grid_adjacency(cols: int, rows: int,
+                   radius: Optional[int] = None) -> GridAdjacency:
+    """Neighbour table shared by every maze of one shape and size.
+
+    ``radius`` clips the grid to ``circle_mask(radius)``.
+    """
+    size = cols * rows
+    if radius is None:
+        valid = b'\x01' * size
+    else:
+        valid = circle_mask(radius)
+    # Every byte of these integers is 0 or 1, so shifting by whole bytes
+    # lines each cell up with its neighbour, and the AND, the scaling by
+    # a wall bit and the OR never carry into the next byte.
+    cells = int.from_bytes(valid, 'little')
+    not_last = int.from_bytes((b'\x01' * (cols - 1) + b'\x00') * rows,
+                              'little')
+    not_first = not_last << 8
+    row = 8 * cols
+    has = (cells & (cells << row),
+           cells & (cells >> 8) & not_last,
+           cells & (cells >> row),
+           cells & (cells << 8) & not_first)
+    links = 0
+    for direction, neighbours in zip(Directions, has):
+        links |= neighbours * WALL_BITS[direction]
+    offsets = (-cols, 1, cols, -1)
+    steps = tuple(tuple(offsets[direction] for direction in NEIGHBOUR_ORDER
+                        if mask & WALL_BITS[direction])
+                  for mask in range(16))
+    # With a single column the right and bottom offsets coincide; only
+    # the vertical ones can be real neighbours then.
+    walls = {}
+    for direction in (Directions.RIGHT, Directions.LEFT,
+                      Directions.TOP, Directions.BOTTOM):
+        walls[offsets[direction]] = (WALL_BITS[direction],
+                                     WALL_BITS[OPPOSITE[direction]])
+    return GridAdjacency(links.to_bytes(size, 'little'), steps, walls)
+
+
+class Walls(MutableMapping):
+    """Dict-like view of one cell's wall mask keyed by Directions."""
+
+    def __init__(self, maze: 'Maze', index: int):
+        self._maze = maze
+        self._index = index
+
+    def __getitem__(self, direction: Directions) -> bool:
+        return bool(self._maze.walls[self._index] & WALL_BITS[direction])
+
+    def __setitem__(self, direction: Directions, value: bool):
+        if value:
+            self._maze.walls[self._index] |= WALL_BITS[direction]
+        else:
+            self._maze.walls[self._index] &= ~WALL_BITS[direction] & ALL_WALLS
+
+    def __delitem__(self, direction: Directions):
+        raise TypeError('cell walls can not be deleted')
+
+    def __iter__(self):
+        return iter(Directions)
+
+    def __len__(self):
+        return len(Directions)
+
+
 class Cell:
-    x: int
-    y: int
-    walls: Dict[Directions, bool]
-    visited: bool = 0
-    cell_type: CellType = CellType.REGULAR
+    """Lightweight view of a single cell stored in the maze grid buffers."""
+
+    __slots__ = ('maze', 'x', 'y', 'index')
 
-    def __init__(self, x_cord: int, y_cord: int):
+    def __init__(self, maze: 'Maze', x_cord: int, y_cord: int):
+        self.maze = maze
         self.x = x_cord
         self.y = y_cord
-        self.walls = {Directions.TOP: True,
-                      Directions.RIGHT: True,
-                      Directions.BOTTOM: True,
-                      Directions.LEFT: True}
+        self.index = maze.index((x_cord, y_cord))
+
+    @property
+    def walls(self) -> Walls:
+        return Walls(self.maze, self.index)
+
+    @property
+    def visited(self) -> bool:
+        return self.maze.visited[self.index]
+
+    @visited.setter
+    def visited(self, value: bool):
+        self.maze.visited[self.index] = bool(value)
+
+    @property
+    def cell_type(self) -> CellType:
+        return CellType(self.maze.cell_types[self.index])
+
+    @cell_type.setter
+    def cell_type(self, value: CellType):
+        self.maze.cell_types[self.index] = value
 
     def get_cords(self) -> Tuple[int, int]:
         return self.x, self.y
@@ -48,182 +169,326 @@ class Cell:
         return self.x, self.y, e_walls, e_cell_type
 
     @staticmethod
-    def decode_cell(encoded_cell):
+    def decode_cell(maze: 'Maze', encoded_cell):
         (x, y, e_walls, e_cell_type) = encoded_cell
-        new_cell = Cell(x, y)
-        walls = dict(zip(map(Directions, map(int, e_walls.keys())),
-                         e_walls.values()))
-        new_cell.walls = walls
-        new_cell.cell_type = CellType(e_cell_type)
-        return new_cell
+        index = maze.index((x, y))
+        mask = 0
+        for direction, wall in e_walls.items():
+            if wall:
+                mask |= WALL_BITS[int(direction)]
+        maze.walls[index] = mask
+        maze.cell_types[index] = e_cell_type
+
+
+class Cells(Mapping):
+    """Read-only ``{(x, y): Cell}`` view over the packed grid buffers.
+
+    Iterates cells column by column, the same order the old dict had.
+    """
+
+    def __init__(self, maze: 'Maze'):
+        self._maze = maze
+
+    def __getitem__(self, cords: Tuple[int, int]) -> Cell:
+        if cords not in self:
+            raise KeyError(cords)
+        return Cell(self._maze, cords[0], cords[1])
+
+    def __contains__(self, cords) -> bool:
+        return self._maze.contains(cords)
+
+    def __iter__(self):
+        maze = self._maze
+        valid = maze.valid
+        cols = maze.cols
+        for x in range(cols):
+            for y in range(maze.rows):
+                if valid is None or valid[y * cols + x]:
+                    yield x, y
+
+    def __len__(self):
+        return self._maze.cell_count
 
 
 class Maze:
 
-    cells: Dict[Tuple[int, int], Cell]
+    cols: int
+    rows: int
+    adjacency: GridAdjacency
+    walls: bytearray
+    cell_types: bytearray
+    visited: bytearray
+    valid: Optional[bytes] = None
+    path: List[int]
+    dirty: Set[int]
+    dirty_all: bool
     entrance: Tuple[int, int] = None
     exit: Tuple[int, int] = None
-
-    def __init__(self):
+    seed: Optional[int] = None
+    random: random.Random
+    shape: str
+    params: Tuple[int, ...]
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    # Tables every maze of one shape and size shares through an lru
+    # cache; they are left out of pickles and looked up again on load.
+    shared_tables: Tuple[str, ...] = ()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self.shared_tables:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.share_tables()
+
+    def share_tables(self):
         pass
 
+    def allocate(self, cols: int, rows: int, valid: Optional[bytes] = None):
+        self.cols = cols
+        self.rows = rows
+        self.valid = valid
+        self.reset_grid()
+
+    def reset_grid(self):
+        size = self.cols * self.rows
+        self.walls = bytearray(b'\x0f') * size
+        self.cell_types = bytearray(size)
+        self.visited = bytearray(size)
+        self.path = []
+        self._solver = None
+        self.frontier_peak = 0
+        self.dirty = set()
+        self.dirty_all = True
+
+    def mark_dirty(self, cells: Iterable[int]):
+        """Remember cells whose on-screen image is out of date."""
+        self.dirty.update(cells)
+
+    @property
+    def cells(self) -> Cells:
+        return Cells(self)
+
+    @property
+    def cell_count(self) -> int:
+        if self.valid is None:
+            return self.cols * self.rows
+        return self.valid.count(1)
+
+    def index(self, cords: Tuple[int, int]) -> int:
+        return cords[1] * self.cols + cords[0]
+
+    def cords(self, index: int) -> Tuple[int, int]:
+        y, x = divmod(index, self.cols)
+        return x, y
+
+    def contains(self, cords: Tuple[int, int]) -> bool:
+        x, y = cords
+        if not (0 <= x < self.cols and 0 <= y < self.rows):
+            return False
+        return self.valid is None or bool(self.valid[y * self.cols + x])
+
     def set_exit(self, exit_cords: Tuple[int, int]):
         if self.exit is not None:
-            self.cells[self.exit].cell_type = CellType.REGULAR
+            self.cell_types[self.index(self.exit)] = CellType.REGULAR
+            self.dirty.add(self.index(self.exit))
         self.exit = exit_cords
-        self.cells[exit_cords].cell_type = CellType.OUT
+        self.cell_types[self.index(exit_cords)] = CellType.OUT
+        self.dirty.add(self.index(exit_cords))
 
     def set_enter(self, entrance_cords: Tuple[int, int]):
-        self.cells[self.entrance].cell_type = CellType.REGULAR
+        self.cell_types[self.index(self.entrance)] = CellType.REGULAR
+        self.dirty.add(self.index(self.entrance))
         self.entrance = entrance_cords
-        self.cells[entrance_cords].cell_type = CellType.IN
+        self.cell_types[self.index(entrance_cords)] = CellType.IN
+        self.dirty.add(self.index(entrance_cords))
 
     def reset_cells_path(self):
-        for cell in self.cells:
-            if self.cells[cell].cell_type == CellType.PATH:
-                self.cells[cell].cell_type = CellType.REGULAR
-        Maze.calculate_times.visited = {cell: 0 for cell in self.cells.keys()}
+        cell_types = self.cell_types
+        for cell in self.path:
+            if cell_types[cell] == CellType.PATH:
+                cell_types[cell] = CellType.REGULAR
+        self.dirty.update(self.path)
+        self.path = []
+
+    @staticmethod
+    def create(shape: str, params, seed: Optional[int] = None) -> 'Maze':
+        if shape == 'circular':
+            return CircularMaze(params[0], seed)
+        if shape == 'rectangular':
+            return RectMaze(params[0], params[1], seed)
+        if shape == 'polar':
+            from polar import PolarMaze
+            return PolarMaze(params[0], seed)
+        raise ValueError(f'unknown maze shape: {shape}')
 
     def save_maze(self, name, gen):
-        with open(f'saves/{name}.json', 'a') as file:
-            e_cells = dict(zip(map(str, self.cells.keys()),
-                               map(Cell.encode_cell, self.cells.values())))
-            json.dump(
-                (e_cells, self.entrance, self.exit, gen.cell_size, gen.wall_width),
-                file)
+        from storage import save_binary
+        save_binary(self, f'saves/{name}.maze', gen.cell_size, gen.wall_width)
 
     @staticmethod
     def load_maze(name, gen):
-        with open(f'saves/{name}.json', 'r') as file:
-            maze_properties = json.loads(file.readline())
-            if maze_properties[0] == 'circular':
-                new_maze = CircularMaze(maze_properties[1])
-            if maze_properties[0] == 'rectangular':
-                new_maze = RectMaze(maze_properties[1], maze_properties[2])
-            (e_cells, new_maze.entrance, new_maze.exit, gen.cell_size, gen.wall_width) \
-                = json.loads(file.readline())
-            new_maze.entrance = tuple(new_maze.entrance)
-            new_maze.exit = tuple(new_maze.exit)
-            new_maze.cells = dict(zip(map(str_to_tuple, e_cells.keys()),
-                                  map(Cell.decode_cell, e_cells.values())))
-            if maze_properties[0] == 'circular':
-                gen.screen = pygame.display.set_mode(
-                    ((new_maze.radius * 2 - 1) * gen.cell_size,
-                     (new_maze.radius * 2 - 1) * gen.cell_size))
-            if maze_properties[0] == 'rectangular':
-                gen.screen = pygame.display.set_mode(
-                    (new_maze.length * gen.cell_size,
-                     new_maze.width * gen.cell_size))
+        from storage import load_binary, load_json_save
+        if os.path.exists(f'saves/{name}.maze'):
+            new_maze, gen.cell_size, gen.wall_width = \
+                load_binary(f'saves/{name}.maze')
+            if new_maze.exit is not None:
+                new_maze.calculate_path()
+        else:
+            new_maze, gen.cell_size, gen.wall_width = \
+                load_json_save(f'saves/{name}.json')
+            if new_maze.exit is not None:
+                new_maze.calculate_path()
         return new_maze
 
     def distruct_walls(self, first_cell_cords: Tuple[int, int],
                        second_cell_cords: Tuple[int, int]):
-        if second_cell_cords[0] - first_cell_cords[0] == 1:
-            self.cells[first_cell_cords].walls[Directions.RIGHT] = False
-            self.cells[second_cell_cords].walls[Directions.LEFT] = False
-        if second_cell_cords[0] - first_cell_cords[0] == -1:
-            self.cells[first_cell_cords].walls[Directions.LEFT] = False
-            self.cells[second_cell_cords].walls[Directions.RIGHT] = False
-        if second_cell_cords[1] - first_cell_cords[1] == 1:
-            self.cells[first_cell_cords].walls[Directions.BOTTOM] = False
-            self.cells[second_cell_cords].walls[Directions.TOP] = False
-        if second_cell_cords[1] - first_cell_cords[1] == -1:
-            self.cells[first_cell_cords].walls[Directions.TOP] = False
-            self.cells[second_cell_cords].walls[Directions.BOTTOM] = False
-
-    def generate_maze_dfs(self, gen, starting_cords: Tuple[int, int] = None):
+        self._solver = None
+        first = self.index(first_cell_cords)
+        second = self.index(second_cell_cords)
+        self.carve(first, second)
+        self.dirty.update((first, second))
+
+    def carve(self, first: int, second: int):
+        bit, opposite = self.adjacency.walls[second - first]
+        self.walls[first] &= ~bit
+        self.walls[second] &= ~opposite
+
+    def neighbours(self, cords: Tuple[int, int]) -> List[Tuple[int, int]]:
+        return [self.cords(index)
+                for index in self.neighbour_indices(self.index(cords))]
+
+    def neighbour_indices(self, index: int) -> List[int]:
+        """Indices of the cells next to ``index``: top, bottom, left, right."""
+        adjacency = self.adjacency
+        return [index + step
+                for step in adjacency.steps[adjacency.links[index]]]
+
+    def generate(self, gen, algorithm: str,
+                 starting_cords: Tuple[int, int] = None,
+                 seed: Optional[int] = None):
+        """Carve the maze with a generator from the ``algorithms`` registry."""
+        from algorithms import get_algorithm
+        steps = get_algorithm(algorithm, self.shape).steps
+        if seed is not None:
+            self.random.seed(seed)
+        self._solver = None
+        return run_steps(gen, steps(self, starting_cords))
+
+    def generate_maze_dfs(self, gen, starting_cords: Tuple[int, int] = None,
+                          seed: Optional[int] = None):
+        return run_steps(gen, self.iter_maze_dfs(starting_cords, seed))
+
+    def iter_maze_dfs(self, starting_cords: Tuple[int, int] = None,
+                      seed: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Carve the maze with DFS, yielding every carved pair of cells."""
         if starting_cords is None:
             starting_cords = self.entrance
-        x, y = starting_cords
-        self.cells[(x, y)].visited = 1
-        possible_cells: List[Tuple[int, int]] = []
-        dir_coords = {Directions.TOP: (x, y - 1),
-                      Directions.BOTTOM: (x, y + 1),
-                      Directions.LEFT: (x - 1, y),
-                      Directions.RIGHT: (x + 1, y)}
-        for direction, cords in dir_coords.items():
-            if cords in self.cells:
-                possible_cells.append(cords)
-        random.shuffle(possible_cells)
-
-        for next_cell in possible_cells:
-            if not self.cells[next_cell].visited:
-                self.distruct_walls((x, y), next_cell)
-                if gen.with_visuals:
-                    cell_size = gen.cell_size
-                    wall_width = gen.wall_width
-                    draw_cell(self.cells[(x, y)], gen)
-                    draw_cell(self.cells[next_cell], gen)
-                    pygame.display.flip()
-                    gen.clock.tick(gen.fps)
-                self.generate_maze_dfs(gen, starting_cords=next_cell)
-
-    def generate_maze_prims_helper(self, cur_cord, next_cord, walls):
-        not_visited = []
-        if not self.cells[next_cord].visited:
-            not_visited.append(next_cord)
-        if not self.cells[cur_cord].visited:
-            not_visited.append(cur_cord)
-        self.distruct_walls(cur_cord, next_cord)
-        walls += [(next_cord, i) for i in range(4)]
-        self.cells[random.choice(not_visited)].visited = 1
-
-    def generate_maze_prims(self, gen, starting_cords: Tuple[int, int] = None):
+        if seed is not None:
+            self.random.seed(seed)
+        self._solver = None
+        visited = self.visited
+        neighbour_indices = self.neighbour_indices
+        shuffle = self.random.shuffle
+        start = self.index(starting_cords)
+        visited[start] = 1
+        possible_cells = neighbour_indices(start)
+        shuffle(possible_cells)
+        stack = [(start, iter(possible_cells))]
+        while stack:
+            cur, candidates = stack[-1]
+            for next_cell in candidates:
+                if not visited[next_cell]:
+                    break
+            else:
+                stack.pop()
+                continue
+            self.carve(cur, next_cell)
+            yield cur, next_cell
+            visited[next_cell] = 1
+            possible_cells = neighbour_indices(next_cell)
+            shuffle(possible_cells)
+            stack.append((next_cell, iter(possible_cells)))
+
+    def generate_maze_prims(self, gen, starting_cords: Tuple[int, int] = None,
+                            seed: Optional[int] = None):
+        return run_steps(gen, self.iter_maze_prims(starting_cords, seed))
+
+    def iter_maze_prims(self, starting_cords: Tuple[int, int] = None,
+                        seed: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Carve the maze with Prim's, yielding every carved pair of cells."""
         if starting_cords is None:
             starting_cords = self.entrance
-        walls = [(starting_cords, i) for i in range(4)]
-        while len(walls) != 0:
-            index = random.randint(0, len(walls) - 1)
-            (x, y), n_wall = walls[index]
-            n_wall = Directions(n_wall)
-            dir_coords = {Directions.TOP: (x, y-1),
-                          Directions.BOTTOM: (x, y+1),
-                          Directions.LEFT: (x-1, y),
-                          Directions.RIGHT: (x+1, y)}
-            cords = dir_coords[n_wall]
-            if cords in self.cells and \
-                    (not self.cells[cords].visited or
-                    not self.cells[(x, y)].visited):
-                Maze.generate_maze_prims_helper(self, (x, y), cords, walls)
-                if gen.with_visuals:
-                    cell_size = gen.cell_size
-                    wall_width = gen.wall_width
-                    draw_cell(self.cells[(x, y)], gen)
-                    draw_cell(self.cells[cords], gen)
-                    pygame.display.flip()
-                    gen.clock.tick(gen.fps)
-            walls[-1], walls[index] = walls[index], walls[-1]
-            walls.pop()
-
-    def calculate_times(self, starting_cords: Tuple[int, int] = None):
-        if starting_cords is None:
-            starting_cords = self.entrance
-        if not hasattr(Maze.calculate_times, 'time'):
-            setattr(Maze.calculate_times, 't_in', {})
-            setattr(Maze.calculate_times, 't_out', {})
-            setattr(Maze.calculate_times, 'visited', {})
-            Maze.calculate_times.visited = \
-                {cell: 0 for cell in self.cells.keys()}
-            setattr(Maze.calculate_times, 'time', 0)
-        x, y = starting_cords
-        Maze.calculate_times.time += 1
-        Maze.calculate_times.t_in[(x, y)] = Maze.calculate_times.time
-        Maze.calculate_times.visited[(x, y)] = 1
-        possible_cells: List[Tuple[int, int]] = []
-        dir_coords = {Directions.TOP: (x, y - 1),
-                      Directions.BOTTOM: (x, y + 1),
-                      Directions.LEFT: (x - 1, y),
-                      Directions.RIGHT: (x + 1, y)}
-        for direction, cords in dir_coords.items():
-            if not self.cells[(x, y)].walls[direction]:
-                possible_cells.append(cords)
-
-        for next_cell in possible_cells:
-            if Maze.calculate_times.visited[next_cell] == 0:
-                self.calculate_times(next_cell)
-
-        Maze.calculate_times.time += 1
-        Maze.calculate_times.t_out[(x, y)] = Maze.calculate_times.time
+        if seed is not None:
+            self.random.seed(seed)
+        self._solver = None
+        visited = self.visited
+        walls = self.walls
+        links = self.adjacency.links
+        cols = self.cols
+        offsets = (-cols, 1, cols, -1)
+        directions = tuple(Directions)
+        bits = WALL_BITS
+        opposite = OPPOSITE
+        randrange = self.random.randrange
+        # Frontier edges, encoded as cell * 4 + direction, always lead from a
+        # carved cell to an uncarved one. ``position`` maps an edge to its
+        # slot in ``frontier`` so stale edges can be swap-removed in O(1).
+        frontier: List[int] = []
+        position: Dict[int, int] = {}
+
+        def remove(slot: int):
+            last = frontier.pop()
+            if slot < len(frontier):
+                frontier[slot] = last
+                position[last] = slot
+
+        def add(cell: int):
+            visited[cell] = 1
+            mask = links[cell]
+            for direction in directions:
+                if not mask & bits[direction]:
+                    continue
+                neighbour = cell + offsets[direction]
+                if visited[neighbour]:
+                    edge = neighbour * 4 + opposite[direction]
+                    slot = position.pop(edge, None)
+                    if slot is not None:
+                        remove(slot)
+                else:
+                    edge = cell * 4 + direction
+                    position[edge] = len(frontier)
+                    frontier.append(edge)
+
+        add(self.index(starting_cords))
+        peak = self.frontier_peak = len(frontier)
+        while frontier:
+            slot = randrange(len(frontier))
+            edge = frontier[slot]
+            del position[edge]
+            remove(slot)
+            cur, direction = divmod(edge, 4)
+            next_cell = cur + offsets[direction]
+            walls[cur] &= ~bits[direction]
+            walls[next_cell] &= ~bits[opposite[direction]]
+            add(next_cell)
+            if len(frontier) > peak:
+                peak = len(frontier)
+                self.frontier_peak = peak
+            yield cur, next_cell
+
+    @property
+    def solver(self) -> 'MazeSolver':
+        if self._solver is None:
+            from solver import MazeSolver
+            self._solver = MazeSolver(self)
+        return self._solver
 
     def calculate_path(self, ending_cords: Tuple[int, int] = None,
                        starting_cords: Tuple[int, int] = None):
@@ -232,127 +497,90 @@ class Maze:
         if ending_cords is None:
             ending_cords = self.exit
 
-        self.calculate_times(starting_cords)
-        Maze.calculate_times.__delattr__('time')
-        for cell in self.cells.keys():
-            if Maze.calculate_times.t_in[cell] <= \
-                    Maze.calculate_times.t_in[ending_cords] and \
-                    Maze.calculate_times.t_out[cell] >= \
-                    Maze.calculate_times.t_out[ending_cords]:
-                if self.cells[cell].cell_type == CellType.REGULAR:
-                    self.cells[cell].cell_type = CellType.PATH
+        self.reset_cells_path()
+        self.path = self.solver.path(self.index(starting_cords),
+                                     self.index(ending_cords))
+        cell_types = self.cell_types
+        for cell in self.path:
+            if cell_types[cell] == CellType.REGULAR:
+                cell_types[cell] = CellType.PATH
+        self.dirty.update(self.path)
 
 
 class CircularMaze(Maze):
+    shape = 'circular'
+    shared_tables = ('valid', 'adjacency')
     radius: int
 
-    def __init__(self, radius: int):
-        super().__init__()
-        self.cells = {(x, y): Cell(x, y) for x in range(radius * 2 + 1)
-                      for y in range(radius * 2 + 1)
-                      if ((x - radius + 1) ** 2 + (y - radius + 1) ** 2) <
-                      radius ** 2}
-        self.entrance = (radius-1, radius-1)
-        self.cells[self.entrance].cell_type = CellType.IN
+    def __init__(self, radius: int, seed: Optional[int] = None):
+        super().__init__(seed)
         self.radius = radius
+        self.allocate(radius * 2 - 1, radius * 2 - 1, circle_mask(radius))
+        self.share_tables()
+        self.entrance = (radius-1, radius-1)
+        self.cell_types[self.index(self.entrance)] = CellType.IN
+
+    def share_tables(self):
+        self.valid = circle_mask(self.radius)
+        self.adjacency = grid_adjacency(self.cols, self.rows, self.radius)
 
     def reset(self):
-        radius = self.radius
-        self.cells = {(x, y): Cell(x, y) for x in range(radius * 2 + 1) for y in
-                      range(radius * 2 + 1) if
-                      ((x - radius + 1) ** 2 + (
-                                  y - radius + 1) ** 2) < radius ** 2}
+        self.reset_grid()
         self.set_enter(self.entrance)
         self.set_exit(self.exit)
-        Maze.calculate_times.visited = {cell: 0 for cell in self.cells.keys()}
 
-    def save_maze(self, name, gen):
-        with open(f'saves/{name}.json', 'w') as file:
-            json.dump(('circular', self.radius), file)
-            file.write('\n')
-        super(CircularMaze, self).save_maze(name, gen)
+    @property
+    def params(self) -> Tuple[int]:
+        return self.radius,
 
 
 class RectMaze(Maze):
+    shape = 'rectangular'
+    shared_tables = ('adjacency',)
     width: int
     length: int
 
-    def __init__(self, length: int, width: int):
-        super().__init__()
-        self.cells = {(x, y): Cell(x, y) for x in range(length)
-                      for y in range(width)}
+    def __init__(self, length: int, width: int, seed: Optional[int] = None):
+        super().__init__(seed)
         self.width = width
         self.length = length
+        self.allocate(length, width)
+        self.share_tables()
         self.entrance = (0, 0)
-        self.cells[self.entrance].cell_type = CellType.IN
+        self.cell_types[self.index(self.entrance)] = CellType.IN
+
+    def share_tables(self):
+        self.adjacency = grid_adjacency(self.length, self.width)
 
     def reset(self):
-        self.cells = {(x, y): Cell(x, y) for x in range(self.length) for y in
-                      range(self.width)}
+        self.reset_grid()
         self.set_enter(self.entrance)
         self.set_exit(self.exit)
-        Maze.calculate_times.visited = {cell: 0 for cell in self.cells.keys()}
 
-    def save_maze(self, name, gen):
-        with open(f'saves/{name}.json', 'w') as file:
-            json.dump(('rectangular', self.length, self.width), file)
-            file.write('\n')
-        super(RectMaze, self).save_maze(name, gen)
-
-
-def draw_maze(gen):
-    for cell in gen.maze.cells.values():
-        draw_cell(cell, gen)
-
-
-def draw_cell(cell: Cell, gen, x0: int = 0, y0: int = 0):
-    cell_size = gen.cell_size
-    wall_width = gen.wall_width
-    screen = gen.screen
-    x, y = x0 + cell.x * cell_size, y0 + cell.y * cell_size
-    # if cell.visited == 1:
-    pygame.draw.rect(screen, 'darkgreen', (x, y, cell_size, cell_size))
-    if gen.with_path:
-        if cell.cell_type == CellType.PATH:
-            pygame.draw.circle(screen, 'blue', (x + cell_size / 2, y + cell_size / 2), cell_size / 4)
-    # if cell.cell_type == CellType.IN:
-    #     pygame.draw.circle(screen, 'orange', (x + cell_size/2, y + cell_size/2), cell_size/2.7)
-    # if cell.cell_type == CellType.OUT:
-    #     pygame.draw.circle(screen, 'red', (x + cell_size/2, y + cell_size/2), cell_size/2.7)
-
-    if cell.walls[Directions.TOP]:
-        pygame.draw.line(screen, 'black', (x, y), (x + cell_size, y), wall_width)
-    if cell.walls[Directions.BOTTOM]:
-        pygame.draw.line(screen, 'black', (x, y + cell_size), (x + cell_size, y + cell_size), wall_width)
-    if cell.walls[Directions.LEFT]:
-        pygame.draw.line(screen, 'black', (x, y), (x, y + cell_size), wall_width)
-    if cell.walls[Directions.RIGHT]:
-        pygame.draw.line(screen, 'black', (x + cell_size, y), (x + cell_size, y + cell_size), wall_width)
+    @property
+    def params(self) -> Tuple[int, int]:
+        return self.length, self.width
+
+
+class Headless:
+    """Stands in for the Generator when nothing is drawn."""
+    with_visuals = False
+
+
+def run_steps(gen, steps: Iterator[Tuple[int, int]]) -> int:
+    """Drive a carving iterator, animating it when visuals are on.
+
+    Returns the number of carved pairs. pygame is only imported, through
+    ``viewer``, when there is something to animate.
+    """
+    if not gen.with_visuals:
+        last = deque(enumerate(steps, 1), maxlen=1)
+        return last[0][0] if last else 0
+    from viewer import animate_steps
+    return animate_steps(gen, steps)
+
 
 def reconstruct_maze(gen):
     gen.maze.reset()
-    if gen.maze_generator == 0:
-        gen.maze.generate_maze_prims(gen)
-    if gen.maze_generator == 1:
-        gen.maze.generate_maze_dfs(gen)
+    gen.maze.generate(gen, gen.maze_generator)
     gen.maze.calculate_path()
-
-
-def set_entrance_with_mouse(gen):
-    x, y = pygame.mouse.get_pos()
-    x //= gen.cell_size
-    y //= gen.cell_size
-    if (x, y) in gen.maze.cells:
-        gen.maze.reset_cells_path()
-        gen.maze.set_enter((x, y))
-        gen.maze.calculate_path()
-
-
-def set_exit_with_mouse(gen):
-    x, y = pygame.mouse.get_pos()
-    x //= gen.cell_size
-    y //= gen.cell_size
-    if (x, y) in gen.maze.cells.keys():
-        gen.maze.reset_cells_path()
-        gen.maze.set_exit((x, y))
-        gen.maze.calculate_path()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""Registry of maze generation algorithms.
+
+Every algorithm is a function ``steps(maze, starting_cords)`` returning
+an iterator that carves ``maze`` through ``Maze.carve`` and yields each
+carved ``(cell, cell)`` pair of grid indices, using ``maze.random`` as
+its only source of randomness. ``Maze.generate`` looks algorithms up
+here by name.
+"""
+import random
+from array import array
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, \
+    Tuple
+
+from Maze import Maze
+
+Steps = Iterator[Tuple[int, int]]
+ALL_SHAPES = ('rectangular', 'circular', 'polar')
+
+
+class Algorithm(NamedTuple):
+    name: str
+    label: str
+    steps: Callable[[Maze, Optional[Tuple[int, int]]], Steps]
+    shapes: Tuple[str, ...]
+
+
+ALGORITHMS: Dict[str, Algorithm] = {}
+
+
+def register(name: str, label: str, shapes: Tuple[str, ...] = ALL_SHAPES):
+    def decorator(steps):
+        ALGORITHMS[name] = Algorithm(name, label, steps, shapes)
+        return steps
+    return decorator
+
+
+def get_algorithm(name: str, shape: Optional[str] = None) -> Algorithm:
+    if name not in ALGORITHMS:
+        raise ValueError(f'unknown maze generator: {name}')
+    algorithm = ALGORITHMS[name]
+    if shape is not None and shape not in algorithm.shapes:
+        raise ValueError(f'{name} can not generate {shape} mazes')
+    return algorithm
+
+
+def algorithms_for(shape: str) -> List[Algorithm]:
+    return [algorithm for algorithm in ALGORITHMS.values()
+            if shape in algorithm.shapes]
+
+
+@register('DFS', 'DFS')
+def dfs_steps(maze: Maze, starting_cords=None) -> Steps:
+    return maze.iter_maze_dfs(starting_cords)
+
+
+@register('Prims', 'Prim')
+def prims_steps(maze: Maze, starting_cords=None) -> Steps:
+    return maze.iter_maze_prims(starting_cords)
+
+
+def _cells(maze: Maze) -> range:
+    return range(len(maze.walls))
+
+
+def _exists(maze: Maze, cell: int) -> bool:
+    return maze.valid is None or bool(maze.valid[cell])
+
+
+@register('Kruskal', 'Kruskal')
+def kruskal_steps(maze: Maze, starting_cords=None) -> Steps:
+    """Join cells along shuffled edges, tracking components with union-find."""
+    edges = []
+    for cell in _cells(maze):
+        if not _exists(maze, cell):
+            continue
+        for neighbour in maze.neighbour_indices(cell):
+            if neighbour > cell:
+                edges.append((cell, neighbour))
+    maze.random.shuffle(edges)
+    parent = array('i', range(len(maze.walls)))
+
+    def find(cell: int) -> int:
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for first, second in edges:
+        first_root, second_root = find(first), find(second)
+        if first_root != second_root:
+            parent[second_root] = first_root
+            maze.carve(first, second)
+            yield first, second
+
+
+@register('Wilson', 'Wilson')
+def wilson_steps(maze: Maze, starting_cords=None) -> Steps:
+    """Uniform spanning tree from loop-erased random walks."""
+    if starting_cords is None:
+        starting_cords = maze.entrance
+    in_tree = maze.visited
+    neighbour_indices = maze.neighbour_indices
+    choice = maze.random.choice
+    following = array('i', [-1]) * len(maze.walls)
+    in_tree[maze.index(starting_cords)] = 1
+    for start in _cells(maze):
+        if in_tree[start] or not _exists(maze, start):
+            continue
+        cell = start
+        while not in_tree[cell]:
+            following[cell] = choice(neighbour_indices(cell))
+            cell = following[cell]
+        cell = start
+        while not in_tree[cell]:
+            in_tree[cell] = 1
+            maze.carve(cell, following[cell])
+            yield cell, following[cell]
+            cell = following[cell]
+
+
+def eller_rows(cols: int, rows: int, rng: random.Random) \
+        -> Iterator[Tuple[bytearray, bytearray]]:
+    """Eller's algorithm, one row at a time in O(cols) memory.
+
+    Yields ``(right, down)`` for every row: ``right[x]`` is set when the
+    wall between cells x and x + 1 is open and ``down[x]`` when the cell
+    opens into the row below.
+    """
+    labels = list(range(cols))
+    parent = list(range(cols))
+
+    def find(label: int) -> int:
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    for y in range(rows):
+        last = y == rows - 1
+        right = bytearray(cols)
+        down = bytearray(cols)
+        for x in range(cols - 1):
+            first, second = find(labels[x]), find(labels[x + 1])
+            if first != second and (last or rng.random() < 0.5):
+                right[x] = 1
+                parent[second] = first
+        if last:
+            yield right, down
+            break
+        members: Dict[int, List[int]] = {}
+        for x in range(cols):
+            labels[x] = find(labels[x])
+            members.setdefault(labels[x], []).append(x)
+        for cells in members.values():
+            for x in cells:
+                if rng.random() < 0.5:
+                    down[x] = 1
+            if not any(down[x] for x in cells):
+                down[rng.choice(cells)] = 1
+        yield right, down
+        # Cells without a passage down start the next row in a new set;
+        # relabel everything into 0..cols-1 so memory stays O(cols).
+        renumber: Dict[int, int] = {}
+        fresh = iter(range(cols))
+        next_labels = []
+        for x in range(cols):
+            if down[x]:
+                if labels[x] not in renumber:
+                    renumber[labels[x]] = next(fresh)
+                next_labels.append(renumber[labels[x]])
+            else:
+                next_labels.append(None)
+        used = set(renumber.values())
+        spare = (label for label in range(cols) if label not in used)
+        labels = [label if label is not None else next(spare)
+                  for label in next_labels]
+        parent = list(range(cols))
+
+
+@register('Eller', 'Eller', shapes=('rectangular',))
+def eller_steps(maze: Maze, starting_cords=None) -> Steps:
+    cols = maze.cols
+    for y, (right, down) in enumerate(eller_rows(cols, maze.rows,
+                                                 maze.random)):
+        row = y * cols
+        for x in range(cols):
+            if right[x]:
+                maze.carve(row + x, row + x + 1)
+                yield row + x, row + x + 1
+        for x in range(cols):
+            if down[x]:
+                maze.carve(row + x, row + x + cols)
+                yield row + x, row + x + cols
@@ -0,0 +1,76 @@
+"""JSON documents and server-sent events for the HTTP API.
+
+Walls travel as the raw wall-mask buffer, one byte per cell with the
+bits of ``WALL_BITS``, base64 encoded; cells are numbered
+``y * cols + x``. Polar mazes number their cells ring by ring from the
+centre and add each ring's cell count to the header. Nothing here
+depends on Flask.
+"""
+import base64
+import json
+from typing import Iterator, List, Optional, Tuple
+
+from Maze import Directions, Maze, WALL_BITS
+from algorithms import get_algorithm
+from polar import CLOCKWISE, INWARD
+
+WALL_BIT_NAMES = {direction.name.lower(): WALL_BITS[direction]
+                  for direction in Directions}
+POLAR_WALL_BIT_NAMES = {'inward': INWARD, 'clockwise': CLOCKWISE}
+
+
+def _b64(data) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def maze_header(maze: Maze, algorithm: str) -> dict:
+    """Everything a client needs to lay out the grid before any walls."""
+    header = {'shape': maze.shape, 'params': list(maze.params),
+              'cols': maze.cols, 'rows': maze.rows, 'algorithm': algorithm,
+              'seed': maze.seed, 'entrance': list(maze.entrance),
+              'wall_bits': WALL_BIT_NAMES,
+              'valid': None if maze.valid is None else _b64(maze.valid)}
+    if maze.shape == 'polar':
+        header.update(wall_bits=POLAR_WALL_BIT_NAMES,
+                      ring_counts=list(maze.layout.counts))
+    return header
+
+
+def maze_document(maze: Maze, algorithm: str, path: List[int],
+                  exit_cords: Tuple[int, int]) -> dict:
+    document = maze_header(maze, algorithm)
+    document.update(exit=list(exit_cords), walls=_b64(maze.walls),
+                    path=path, path_length=len(path))
+    return document
+
+
+def _event(name: str, data) -> str:
+    return f'event: {name}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def iter_step_events(shape: str, params: tuple, algorithm: str,
+                     seed: Optional[int], batch: int = 256) -> Iterator[str]:
+    """Carve a maze and stream its steps as server-sent events.
+
+    A ``start`` event carries ``maze_header``; every ``steps`` event
+    then holds up to ``batch`` carved pairs flattened into one list
+    ``[a0, b0, a1, b1, ...]``, and ``done`` reports the total. The steps
+    come from the same iterators that drive the pygame animation, so
+    replaying them yields exactly the maze the JSON endpoint returns.
+    """
+    maze = Maze.create(shape, params, seed)
+    steps = get_algorithm(algorithm, shape).steps(maze, None)
+    yield _event('start', maze_header(maze, algorithm))
+    carved = 0
+    pending = []
+    for first, second in steps:
+        pending.append(first)
+        pending.append(second)
+        if len(pending) >= 2 * batch:
+            carved += len(pending) // 2
+            yield _event('steps', pending)
+            pending = []
+    carved += len(pending) // 2
+    if pending:
+        yield _event('steps', pending)
+    yield _event('done', {'carved': carved})
@@ -1,41 +1,381 @@
-from flask import Flask, render_template, request
-from Generator import Generator
-import sys
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, Response, abort, g, render_template, request, \
+    url_for
+from algorithms import ALGORITHMS, algorithms_for
+from api import iter_step_events, maze_document
+from cache import MazeCache, MazeKey
+from metrics import REGISTRY
+from pipeline import IMAGE_TYPES, MazeService, ServiceBusy, default_exit, \
+    image_formats, negotiate, solve_maze
+from pool import MazePool, PoolProfile
+from render import iter_svg, render_region_png, shape_image_size
+import cProfile
+import json
 import os
+import random
+import time
 
 
 app = Flask(__name__)
-image_folder = os.path.join('MazeGenerator/maze_images')
-app.config['UPLOAD_FOLDER'] = image_folder
+maze_cache = MazeCache()
+maze_service = MazeService(maze_cache)
+# Ready mazes for index requests without a seed; the index form's
+# defaults are the first profile it stocks.
+maze_pool = MazePool(maze_service)
+maze_pool.warm([PoolProfile('circular', 20, 'DFS', 10, 5)])
+TILE_SIZE = 256
+MAX_ZOOM = 6
+MAX_TILED_RADIUS = 1200
+MAX_API_CELLS = 4_000_000
+# The step stream carves its maze in the web process, holding the GIL,
+# so it gets a much smaller cap than the worker-built API mazes.
+MAX_STREAM_CELLS = 250_000
+MAX_THUMBNAIL_SIDE = 1024
+# Largest full image a request may ask a worker to draw.
+MAX_IMAGE_PIXELS = 16_000_000
+# Requests with ?profile=1 are run under cProfile and dumped here.
+PROFILE_DIR = os.environ.get('MAZE_PROFILE_DIR')
+
+
+@app.before_request
+def start_request():
+    g.started = time.perf_counter()
+    g.profile = None
+    if PROFILE_DIR and request.args.get('profile'):
+        g.profile_name = os.path.join(
+            PROFILE_DIR, f'{time.time_ns()}-{request.endpoint}')
+        g.profile = cProfile.Profile()
+        g.profile.enable()
+
+
+@app.after_request
+def finish_request(response):
+    if g.get('profile') is not None:
+        g.profile.disable()
+        g.profile.dump_stats(g.profile_name + '.prof')
+    if 'started' in g:
+        REGISTRY.observe('request_seconds', time.perf_counter() - g.started,
+                         endpoint=request.endpoint)
+    REGISTRY.inc('requests_total', endpoint=request.endpoint,
+                 status=response.status_code)
+    return response
+
+
+# What the maze service raises when it cannot build right now; 503.
+SERVICE_ERRORS = (ServiceBusy, TimeoutError, BrokenProcessPool)
+
+
+def worker_profile_path():
+    if g.get('profile') is not None:
+        return g.profile_name + '.worker.prof'
+    return None
+
+
+def get_maze(key, with_image=True):
+    try:
+        return maze_service.get(key, with_image, worker_profile_path())
+    except SERVICE_ERRORS:
+        abort(503)
+
+
+def get_image(key, image_format, max_side=None):
+    try:
+        return maze_service.image(key, image_format, max_side,
+                                  worker_profile_path())
+    except SERVICE_ERRORS:
+        abort(503)
+
+
+def counted(chunks, kind):
+    """Pass ``chunks`` through, counting the bytes sent as ``kind``."""
+    REGISTRY.inc('render_calls_total', kind=kind)
+    for chunk in chunks:
+        REGISTRY.inc('bytes_written_total', len(chunk), kind=kind)
+        yield chunk
+
+
+def supports_circular(algorithm):
+    return algorithm in ALGORITHMS and \
+        'circular' in ALGORITHMS[algorithm].shapes
+
+
+def image_url(key):
+    return url_for('maze_image_negotiated', shape=key.shape, size=key.size,
+                   algorithm=key.algorithm, seed=key.seed,
+                   cell_size=key.cell_size, wall_width=key.wall_width)
+
+
+def image_fits(shape, size, cell_size, wall_width):
+    if size < 1 or cell_size < 1 or wall_width < 0:
+        return False
+    width, height = shape_image_size(shape, (size,), cell_size, wall_width)
+    return width * height <= MAX_IMAGE_PIXELS
+
+
+def image_key(shape, size, algorithm, seed, cell_size, wall_width):
+    if shape not in ('circular', 'polar') or size > 90 or \
+            not supports_circular(algorithm) or \
+            not image_fits(shape, size, cell_size, wall_width):
+        abort(404)
+    return MazeKey(shape, size, algorithm, seed, cell_size, wall_width)
+
+
+@app.route('/maze/<shape>/<int:size>/<algorithm>/<int:seed>/'
+           '<int:cell_size>/<int:wall_width>.png')
+def maze_image(shape, size, algorithm, seed, cell_size, wall_width):
+    key = image_key(shape, size, algorithm, seed, cell_size, wall_width)
+    etag = '-'.join(map(str, key))
+    if etag in request.if_none_match:
+        return Response(status=304)
+    return cached_response(get_maze(key).image, 'image/png', etag)
+
+
+@app.route('/maze/<shape>/<int:size>/<algorithm>/<int:seed>/'
+           '<int:cell_size>/<int:wall_width>')
+def maze_image_negotiated(shape, size, algorithm, seed, cell_size,
+                          wall_width):
+    """The maze image in the format the Accept header prefers.
+
+    ``?format=`` overrides the header and ``?thumb=N`` shrinks the
+    image to at most N pixels across (raster formats only).
+    """
+    key = image_key(shape, size, algorithm, seed, cell_size, wall_width)
+    thumb = request.args.get('thumb', type=int)
+    if thumb is not None and not 0 < thumb <= MAX_THUMBNAIL_SIDE:
+        abort(400)
+    formats = image_formats(thumbnail=thumb is not None)
+    image_format = request.args.get('format') or \
+        negotiate(request.headers.get('Accept'), formats)
+    if image_format not in formats:
+        abort(406)
+    etag = '-'.join(map(str, key)) + f'-{image_format}'
+    if thumb is not None:
+        etag += f'-{thumb}'
+    if etag in request.if_none_match:
+        return Response(status=304)
+    response = cached_response(get_image(key, image_format, thumb),
+                               IMAGE_TYPES[image_format], etag)
+    response.vary.add('Accept')
+    return response
+
+
+def cached_response(data, mimetype, etag):
+    response = Response(data, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
+
+
+def tile_geometry(maze, zoom):
+    cell_size = 2 ** zoom
+    wall_width = cell_size // 4
+    width = maze.cols * cell_size + wall_width // 2
+    height = maze.rows * cell_size + wall_width // 2
+    return cell_size, wall_width, width, height
+
+
+@app.route('/tiles/<shape>/<int:size>/<algorithm>/<int:seed>/'
+           '<int:zoom>/<int:x>/<int:y>.png')
+def maze_tile(shape, size, algorithm, seed, zoom, x, y):
+    if shape != 'circular' or size > MAX_TILED_RADIUS or zoom > MAX_ZOOM \
+            or not supports_circular(algorithm):
+        abort(404)
+    etag = f'{shape}-{size}-{algorithm}-{seed}-{zoom}-{x}-{y}'
+    if etag in request.if_none_match:
+        return Response(status=304)
+    maze = get_maze(MazeKey(shape, size, algorithm, seed, 0, 0),
+                    with_image=False).maze
+    cell_size, wall_width, width, height = tile_geometry(maze, zoom)
+    x0, y0 = x * TILE_SIZE, y * TILE_SIZE
+    if x0 >= width or y0 >= height:
+        abort(404)
+    with REGISTRY.stage('render_tile'):
+        tile = render_region_png(maze, cell_size, wall_width, x0, y0,
+                                 min(TILE_SIZE, width - x0),
+                                 min(TILE_SIZE, height - y0))
+    REGISTRY.inc('render_calls_total', kind='tile')
+    REGISTRY.inc('bytes_written_total', len(tile), kind='tile')
+    return cached_response(tile, 'image/png', etag)
+
+
+@app.route('/tiles/<shape>/<int:size>/<algorithm>/<int:seed>/')
+def tile_viewer(shape, size, algorithm, seed):
+    if shape != 'circular' or size > MAX_TILED_RADIUS or \
+            not supports_circular(algorithm):
+        abort(404)
+    side = size * 2 - 1
+    return render_template('tiles.html', shape=shape, size=size,
+                           algorithm=algorithm, seed=seed, side=side,
+                           tile_size=TILE_SIZE, max_zoom=MAX_ZOOM)
+
+
+def maze_cells(shape, params):
+    """About how many cells a maze has, or None for unknown shapes."""
+    if shape == 'circular' and len(params) == 1:
+        return (params[0] * 2 - 1) ** 2
+    if shape == 'polar' and len(params) == 1:
+        # Rings keep their cells roughly square, so about pi * r^2 cells.
+        return 3.15 * params[0] ** 2
+    if shape == 'rectangular' and len(params) == 2:
+        return params[0] * params[1]
+    return None
+
+
+def api_key(shape, size, algorithm, seed, max_cells=MAX_API_CELLS):
+    """MazeKey for an API request; ``size`` is ``R``, ``RINGS`` or
+    ``LENGTHxWIDTH``."""
+    try:
+        params = tuple(int(part) for part in size.split('x'))
+    except ValueError:
+        abort(404)
+    cells = maze_cells(shape, params)
+    if cells is None:
+        abort(404)
+    size = params if shape == 'rectangular' else params[0]
+    if min(params) < 1 or cells > max_cells or \
+            algorithm not in ALGORITHMS or \
+            shape not in ALGORITHMS[algorithm].shapes:
+        abort(404)
+    return MazeKey(shape, size, algorithm, seed, 0, 0)
+
+
+def parse_cords(text):
+    try:
+        x, y = map(int, text.split(','))
+    except ValueError:
+        abort(400)
+    return x, y
+
+
+@app.route('/api/maze/<shape>/<size>/<algorithm>/<int:seed>')
+def api_maze(shape, size, algorithm, seed):
+    """Walls, solution path and metadata of one maze as JSON.
+
+    ``?exit=X,Y`` picks the end of the path; with ``?wait=0`` a maze that
+    is not built yet answers 202 at once instead of blocking the thread.
+    """
+    key = api_key(shape, size, algorithm, seed)
+    if request.args.get('wait') == '0':
+        try:
+            entry = maze_service.get_nowait(key, with_image=False)
+        except SERVICE_ERRORS:
+            abort(503)
+        if entry is None:
+            response = Response(json.dumps({'status': 'pending'}),
+                                status=202, mimetype='application/json')
+            response.headers['Retry-After'] = '1'
+            return response
+    else:
+        entry = get_maze(key, with_image=False)
+    maze = entry.maze
+    exit_cords = default_exit(maze)
+    if 'exit' in request.args:
+        exit_cords = parse_cords(request.args['exit'])
+        if not maze.contains(exit_cords):
+            abort(400)
+    etag = '-'.join(map(str, (*key[:4], *exit_cords)))
+    if etag in request.if_none_match:
+        return Response(status=304)
+    path = solve_maze(maze, end=exit_cords)
+    document = maze_document(maze, algorithm, path, exit_cords)
+    body = json.dumps(document, separators=(',', ':')).encode()
+    REGISTRY.inc('render_calls_total', kind='json')
+    REGISTRY.inc('bytes_written_total', len(body), kind='json')
+    return cached_response(body, 'application/json', etag)
+
+
+@app.route('/api/maze/<shape>/<size>/<algorithm>/<int:seed>/steps')
+def api_steps(shape, size, algorithm, seed):
+    """Stream the carving steps as server-sent events (see ``api``)."""
+    key = api_key(shape, size, algorithm, seed, MAX_STREAM_CELLS)
+    params = key.size if isinstance(key.size, tuple) else (key.size,)
+    batch = min(max(request.args.get('batch', 256, type=int), 1), 65536)
+    events = iter_step_events(shape, params, algorithm, seed, batch)
+    response = Response(counted((event.encode() for event in events), 'sse'),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    REGISTRY.set('cache_entries', len(maze_cache))
+    REGISTRY.set('cache_bytes', maze_cache.nbytes)
+    REGISTRY.set('cache_hits', maze_cache.hits)
+    REGISTRY.set('cache_misses', maze_cache.misses)
+    REGISTRY.set('pool_entries', len(maze_pool))
+    REGISTRY.set('pool_hits', maze_pool.hits)
+    REGISTRY.set('pool_misses', maze_pool.misses)
+    REGISTRY.set('pool_hit_ratio', maze_pool.hit_rate)
+    return Response(REGISTRY.render(),
+                    mimetype='text/plain; version=0.0.4')
+
 
 @app.route('/', methods=['POST', 'GET'])
 def index():
-    generator = Generator()
-    image_path = os.path.join(app.config['UPLOAD_FOLDER'], 'maze_image.jpg')
+    src = None
+    tiles = None
     rad = 20
     cell_size = 10
     wall_width = 5
     gen_algo = 'DFS'
+    shape = 'circular'
+    seed = ''
     if request.method == 'POST':
         rad = int(request.form['radius'])
         cell_size = int(request.form['cell_size'])
         wall_width = int(request.form['wall_width'])
         gen_algo = request.form['generator']
+        shape = request.form.get('shape', 'circular')
+        as_svg = request.form.get('format',
+                                  request.args.get('format')) == 'svg'
+        if not supports_circular(gen_algo) or \
+                shape not in ('circular', 'polar'):
+            abort(400)
+        if (as_svg or rad <= 90) and \
+                not image_fits(shape, rad, cell_size, wall_width):
+            abort(400)
+        # The SVG is streamed from this thread, so it gets the API's cap.
+        if as_svg and maze_cells(shape, (rad,)) > MAX_API_CELLS:
+            abort(400)
+        # Past 90 only circular mazes have a page to show, the tiled one.
+        if not as_svg and rad > 90 and \
+                (shape != 'circular' or rad > MAX_TILED_RADIUS):
+            abort(400)
+        seed = request.form.get('seed', '')
+        ready = None
+        if not seed and rad <= 90:
+            ready = maze_pool.take(
+                PoolProfile(shape, rad, gen_algo, cell_size, wall_width))
+        if ready is not None:
+            key = ready[0]
+            seed = key.seed
+        else:
+            seed = int(seed) if seed else random.randrange(2 ** 32)
+            key = MazeKey(shape, rad, gen_algo, seed, cell_size, wall_width)
+        if as_svg:
+            entry = get_maze(key, with_image=False)
+            svg = iter_svg(entry.maze, cell_size, wall_width)
+            return Response(counted((chunk.encode() for chunk in svg), 'svg'),
+                            mimetype='image/svg+xml')
         if rad <= 90:
-            generator.web_init(rad, cell_size, wall_width, gen_algo)
-            generator.dump_maze_image('static/maze.png')
-        return render_template('base.html', src=image_path, rad=rad,
-                               cell_size=cell_size, wall_width=wall_width,
-                               gen=gen_algo)
-    else:
-        return render_template('base.html', src=image_path, rad=rad,
-                               cell_size=cell_size, wall_width=wall_width,
-                               gen=gen_algo)
+            # The image itself is encoded when the browser fetches it,
+            # in whichever format it asks for.
+            get_maze(key, with_image=False)
+            src = image_url(key)
+        elif shape == 'circular' and rad <= MAX_TILED_RADIUS:
+            tiles = url_for('tile_viewer', shape=key.shape, size=key.size,
+                            algorithm=key.algorithm, seed=key.seed)
+    algorithms = [(algorithm.name, algorithm.label)
+                  for algorithm in algorithms_for('circular')]
+    return render_template('base.html', src=src, tiles=tiles, rad=rad,
+                           cell_size=cell_size, wall_width=wall_width,
+                           gen=gen_algo, shape=shape, seed=seed,
+                           algorithms=algorithms)
 
 
 if __name__ == '__main__':
-    print('asdddddddddddddddddddddddddddddddddd')
-    generator = Generator()
-    generator.web_init(20, 10, 5, 'dfs')
-    generator.dump_maze_image('static/maze.png')
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
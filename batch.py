@@ -0,0 +1,208 @@
+"""Generate large batches of mazes on disk.
+
+Every combination of shape, size, algorithm and seed becomes one job.
+Jobs run in a process pool and each worker writes its files straight
+to the output directory; finished jobs are appended to
+``manifest.jsonl`` so an interrupted run picks up where it stopped.
+
+Example::
+
+    python batch.py out --radius 20 40 --algorithm DFS Prims \\
+        --seeds 0:1000 --format maze png
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import storage
+from algorithms import get_algorithm
+from cache import MazeKey
+from pipeline import create_maze
+from render import iter_svg, render_png
+
+FORMATS = ('maze', 'png', 'svg')
+MANIFEST = 'manifest.jsonl'
+
+
+def job_name(key: MazeKey) -> str:
+    if key.shape == 'circular':
+        size = f'r{key.size}'
+    elif key.shape == 'polar':
+        size = f'{key.size}rings'
+    else:
+        size = f'{key.size[0]}x{key.size[1]}'
+    return f'{key.shape}-{size}-{key.algorithm}-{key.seed}'
+
+
+def iter_keys(sizes: Iterable[Tuple[str, object]], algorithms: Iterable[str],
+              seeds: Iterable[int], cell_size: int = 10,
+              wall_width: int = 2) -> Iterator[MazeKey]:
+    """Expand the parameter grid into one MazeKey per maze.
+
+    Algorithms are looked up in the registry first, so an unknown name
+    raises ValueError before any maze is built; shapes an algorithm
+    can not generate are left out of the grid.
+    """
+    combinations = [(shape, size, algorithm)
+                    for (shape, size), algorithm in itertools.product(
+                        list(sizes), list(algorithms))
+                    if shape in get_algorithm(algorithm).shapes]
+    for (shape, size, algorithm), seed in itertools.product(combinations,
+                                                            seeds):
+        yield MazeKey(shape, size, algorithm, seed, cell_size, wall_width)
+
+
+def _write(path: str, chunks: Iterable) -> int:
+    written = 0
+    with open(path + '.tmp', 'wb') as file:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            written += file.write(chunk)
+    os.replace(path + '.tmp', path)
+    return written
+
+
+def build_job(key: MazeKey, out_dir: str, formats: Sequence[str]) -> int:
+    """Generate one maze and write it in every format; runs in a worker."""
+    maze = create_maze(key)
+    base = os.path.join(out_dir, job_name(key))
+    written = 0
+    for fmt in formats:
+        path = f'{base}.{fmt}'
+        if fmt == 'maze':
+            # Written to a temporary file and renamed, like _write.
+            storage.save_binary(maze, path, key.cell_size, key.wall_width)
+            written += os.path.getsize(path)
+        elif fmt == 'png':
+            written += _write(path, [render_png(maze, key.cell_size,
+                                               key.wall_width)])
+        elif fmt == 'svg':
+            written += _write(path, iter_svg(maze, key.cell_size,
+                                             key.wall_width))
+        else:
+            raise ValueError(f'unknown output format: {fmt}')
+    return written
+
+
+def read_manifest(out_dir: str) -> set:
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as file:
+            return {json.loads(line)['name'] for line in file if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def run_batch(keys: Iterable[MazeKey], out_dir: str,
+              formats: Sequence[str] = ('maze',),
+              workers: Optional[int] = None, resume: bool = True,
+              report_every: float = 5.0, log=print) -> Dict[str, float]:
+    """Build every maze in ``keys`` into ``out_dir`` and return run stats."""
+    os.makedirs(out_dir, exist_ok=True)
+    done = read_manifest(out_dir) if resume else set()
+    workers = workers or os.cpu_count() or 1
+    stats = {'generated': 0, 'skipped': 0, 'failed': 0, 'bytes': 0,
+             'seconds': 0.0}
+    start = last_report = time.perf_counter()
+    keys = iter(keys)
+    with ProcessPoolExecutor(workers) as executor, \
+            open(os.path.join(out_dir, MANIFEST), 'a') as manifest:
+        running = {}
+        while True:
+            while len(running) < workers * 4:
+                key = next(keys, None)
+                if key is None:
+                    break
+                if job_name(key) in done:
+                    stats['skipped'] += 1
+                    continue
+                future = executor.submit(build_job, key, out_dir, formats)
+                running[future] = key
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key = running.pop(future)
+                if future.exception() is not None:
+                    # Left out of the manifest, so a resumed run retries it.
+                    stats['failed'] += 1
+                    if log is not None:
+                        log(f'{job_name(key)} failed: {future.exception()!r}')
+                    continue
+                written = future.result()
+                manifest.write(json.dumps({'name': job_name(key),
+                                           'key': key, 'bytes': written})
+                               + '\n')
+                stats['generated'] += 1
+                stats['bytes'] += written
+            manifest.flush()
+            now = time.perf_counter()
+            if log is not None and now - last_report >= report_every:
+                last_report = now
+                log(f'{stats["generated"]} mazes, '
+                    f'{stats["generated"] / (now - start):.1f} mazes/s')
+    stats['seconds'] = time.perf_counter() - start
+    stats['mazes_per_second'] = stats['generated'] / stats['seconds'] \
+        if stats['seconds'] else 0.0
+    return stats
+
+
+def _seed_range(text: str) -> range:
+    first, _, last = text.partition(':')
+    return range(int(first), int(last)) if last else range(int(first),
+                                                           int(first) + 1)
+
+
+def _rect_size(text: str) -> Tuple[int, int]:
+    length, _, width = text.partition('x')
+    return int(length), int(width or length)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--radius', type=int, nargs='*', default=[],
+                        help='circular maze radii')
+    parser.add_argument('--rect', type=_rect_size, nargs='*', default=[],
+                        help='rectangular maze sizes as LENGTHxWIDTH')
+    parser.add_argument('--algorithm', nargs='+', default=['DFS'])
+    parser.add_argument('--seeds', type=_seed_range, default=range(1),
+                        help='seed or half-open range START:STOP')
+    parser.add_argument('--cell-size', type=int, default=10)
+    parser.add_argument('--wall-width', type=int, default=2)
+    parser.add_argument('--format', nargs='+', choices=FORMATS,
+                        default=['maze'])
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--no-resume', action='store_true')
+    args = parser.parse_args(argv)
+
+    sizes = [('circular', radius) for radius in args.radius] + \
+        [('rectangular', size) for size in args.rect]
+    if not sizes:
+        parser.error('give at least one --radius or --rect size')
+    for name in args.algorithm:
+        try:
+            algorithm = get_algorithm(name)
+        except ValueError as error:
+            parser.error(str(error))
+        for shape in sorted({shape for shape, _ in sizes}):
+            if shape not in algorithm.shapes:
+                print(f'skipping {name} for {shape} mazes: it can not '
+                      f'generate them', file=sys.stderr)
+    keys = iter_keys(sizes, args.algorithm, args.seeds, args.cell_size,
+                     args.wall_width)
+    stats = run_batch(keys, args.out_dir, args.format, args.workers,
+                      resume=not args.no_resume)
+    print(f'{stats["generated"]} generated, {stats["skipped"]} skipped, '
+          f'{stats["failed"]} failed, '
+          f'{stats["bytes"]} bytes in {stats["seconds"]:.1f} s '
+          f'({stats["mazes_per_second"]:.1f} mazes/s)')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
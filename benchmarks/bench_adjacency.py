@@ -0,0 +1,146 @@
+"""Per-cell cost of neighbour lookups with and without the shared table.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_adjacency [--radius R ...] [--rect N ...]
+
+For every geometry this times, in nanoseconds per cell:
+
+* ``build``: building ``grid_adjacency`` once (later mazes of the same
+  shape and size reuse it);
+* ``neighbours``: listing the neighbours of every cell, with the
+  bounds-and-mask arithmetic ``Maze.neighbour_indices`` used to do and
+  with the table;
+* ``carve``: finding the wall between two neighbours, with the old
+  offset comparisons and with the table;
+* ``generate`` and ``solve``: the real code paths, which now use the table.
+
+Compare ``generate``/``solve`` with an older commit through
+``benchmarks.bench_suite --compare``.
+"""
+import argparse
+import time
+from typing import Callable, List, Optional
+
+from Maze import Directions, Headless, Maze, WALL_BITS, OPPOSITE, \
+    grid_adjacency
+
+
+def arithmetic_neighbours(cols: int, rows: int, valid: Optional[bytes],
+                          index: int) -> List[int]:
+    """The lookup every generator step did before the table existed."""
+    y, x = divmod(index, cols)
+    result = []
+    if y > 0:
+        result.append(index - cols)
+    if y < rows - 1:
+        result.append(index + cols)
+    if x > 0:
+        result.append(index - 1)
+    if x < cols - 1:
+        result.append(index + 1)
+    if valid is not None:
+        result = [cell for cell in result if valid[cell]]
+    return result
+
+
+def comparison_carve(walls: bytearray, cols: int, first: int, second: int):
+    diff = second - first
+    if diff == -cols:
+        direction = Directions.TOP
+    elif diff == cols:
+        direction = Directions.BOTTOM
+    elif diff == -1:
+        direction = Directions.LEFT
+    else:
+        direction = Directions.RIGHT
+    walls[first] &= ~WALL_BITS[direction]
+    walls[second] &= ~WALL_BITS[OPPOSITE[direction]]
+
+
+def per_cell(run: Callable[[], object], cells: int, repeat: int) -> float:
+    best = min(_elapsed(run) for _ in range(repeat))
+    return best / cells * 1e9
+
+
+def _elapsed(run: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def measure(shape: str, params: tuple, repeat: int = 3) -> dict:
+    maze = Maze.create(shape, params, 0)
+    cols, rows, valid = maze.cols, maze.rows, maze.valid
+    radius = params[0] if shape == 'circular' else None
+    cells = [cell for cell in range(cols * rows)
+             if valid is None or valid[cell]]
+    count = len(cells)
+    pairs = [(cell, neighbour) for cell in cells
+             for neighbour in maze.neighbour_indices(cell)
+             if neighbour > cell]
+
+    def build():
+        grid_adjacency.cache_clear()
+        grid_adjacency(cols, rows, radius)
+
+    def old_neighbours():
+        for cell in cells:
+            arithmetic_neighbours(cols, rows, valid, cell)
+
+    def new_neighbours():
+        neighbour_indices = maze.neighbour_indices
+        for cell in cells:
+            neighbour_indices(cell)
+
+    def old_carve():
+        walls = bytearray(maze.walls)
+        for first, second in pairs:
+            comparison_carve(walls, cols, first, second)
+
+    def new_carve():
+        carve = maze.carve
+        for first, second in pairs:
+            carve(first, second)
+
+    def generate():
+        Maze.create(shape, params, 0).generate(Headless, 'DFS')
+
+    solved = Maze.create(shape, params, 0)
+    solved.generate(Headless, 'DFS')
+
+    def solve():
+        solved._solver = None
+        solved.solver
+
+    result = {'build': per_cell(build, count, 1)}
+    for name, old, new in (('neighbours', old_neighbours, new_neighbours),
+                           ('carve', old_carve, new_carve)):
+        result[name] = (per_cell(old, count, repeat),
+                        per_cell(new, count, repeat))
+    result['generate'] = per_cell(generate, count, 1)
+    result['solve'] = per_cell(solve, count, repeat)
+    return {'shape': shape, 'size': params, 'cells': count, **result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--radius', type=int, nargs='*', default=[100, 300])
+    parser.add_argument('--rect', type=int, nargs='*', default=[300, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    cases = [('circular', (radius,)) for radius in args.radius] + \
+        [('rectangular', (side, side)) for side in args.rect]
+    print(f'{"case":<20} {"cells":>9} {"build":>6} {"neighbours old/new":>19} '
+          f'{"carve old/new":>14} {"generate":>9} {"solve":>6}   ns per cell')
+    for shape, params in cases:
+        row = measure(shape, params, args.repeat)
+        name = f'{shape}-{"x".join(map(str, params))}'
+        print(f'{name:<20} {row["cells"]:>9} {row["build"]:>6.0f} '
+              f'{row["neighbours"][0]:>9.0f}/{row["neighbours"][1]:<9.0f} '
+              f'{row["carve"][0]:>6.0f}/{row["carve"][1]:<7.0f} '
+              f'{row["generate"]:>9.0f} {row["solve"]:>6.0f}')
+
+
+if __name__ == '__main__':
+    main()
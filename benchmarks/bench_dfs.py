@@ -0,0 +1,41 @@
+"""Time DFS generation of square RectMaze instances of growing size.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_dfs [max_side]
+
+The time per cell should stay flat as the maze grows, i.e. generation
+scales linearly with the number of cells.
+"""
+import sys
+import time
+
+from Maze import Headless, RectMaze
+
+
+def bench(side: int, seed: int = 0):
+    maze = RectMaze(side, side)
+    start = time.perf_counter()
+    maze.generate_maze_dfs(Headless, seed=seed)
+    generated = time.perf_counter() - start
+    maze.set_exit((side - 1, side - 1))
+    start = time.perf_counter()
+    maze.calculate_path()
+    solved = time.perf_counter() - start
+    return generated, solved
+
+
+def main(max_side: int = 2000):
+    print(f'{"cells":>10} {"generate, s":>12} {"us/cell":>8} '
+          f'{"solve, s":>10} {"us/cell":>8}')
+    side = 125
+    while side <= max_side:
+        cells = side * side
+        generated, solved = bench(side)
+        print(f'{cells:>10} {generated:>12.3f} {generated / cells * 1e6:>8.2f} '
+              f'{solved:>10.3f} {solved / cells * 1e6:>8.2f}')
+        side *= 2
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
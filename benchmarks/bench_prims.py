@@ -0,0 +1,66 @@
+"""Compare the frontier-set Prim's generator with the old wall-list one.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_prims [radius ...]
+
+``legacy_prims`` is the previous implementation, kept here only as the
+baseline for the comparison.
+"""
+import random
+import sys
+import time
+
+from Maze import CircularMaze, DIR_OFFSETS, Headless
+
+
+def legacy_prims(maze, starting_cords=None):
+    if starting_cords is None:
+        starting_cords = maze.entrance
+    walls = [(starting_cords, i) for i in range(4)]
+    while len(walls) != 0:
+        index = random.randint(0, len(walls) - 1)
+        (x, y), n_wall = walls[index]
+        dx, dy = DIR_OFFSETS[n_wall]
+        cords = (x + dx, y + dy)
+        if maze.contains(cords) and \
+                (not maze.visited[maze.index(cords)] or
+                 not maze.visited[maze.index((x, y))]):
+            not_visited = []
+            if not maze.visited[maze.index(cords)]:
+                not_visited.append(cords)
+            if not maze.visited[maze.index((x, y))]:
+                not_visited.append((x, y))
+            maze.distruct_walls((x, y), cords)
+            walls += [(cords, i) for i in range(4)]
+            maze.visited[maze.index(random.choice(not_visited))] = 1
+        walls[-1], walls[index] = walls[index], walls[-1]
+        walls.pop()
+
+
+def bench(radius: int, seed: int = 0):
+    maze = CircularMaze(radius)
+    random.seed(seed)
+    start = time.perf_counter()
+    legacy_prims(maze)
+    legacy = time.perf_counter() - start
+
+    maze = CircularMaze(radius)
+    start = time.perf_counter()
+    maze.generate_maze_prims(Headless, seed=seed)
+    current = time.perf_counter() - start
+    return maze.cell_count, legacy, current
+
+
+def main(*radii: int):
+    radii = radii or (20, 50, 100, 200, 500)
+    print(f'{"radius":>6} {"cells":>8} {"before, s":>10} {"after, s":>9} '
+          f'{"speedup":>7}')
+    for radius in radii:
+        cells, legacy, current = bench(radius)
+        print(f'{radius:>6} {cells:>8} {legacy:>10.3f} {current:>9.3f} '
+              f'{legacy / current:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
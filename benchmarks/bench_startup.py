@@ -0,0 +1,70 @@
+"""Cold-start time of the modules a web worker loads.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup [--repo PATH] [--runs N]
+
+Every measurement is a fresh interpreter that imports the module, and
+builds one small maze when a statement is given, then reports the
+elapsed time and whether pygame ended up loaded. Point ``--repo`` at
+another checkout (e.g. a ``git worktree`` of an older commit) to
+compare before and after.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CASES = (
+    ('import Maze', 'import Maze', ''),
+    ('import pipeline', 'import pipeline', ''),
+    ('first maze', 'import pipeline',
+     'from cache import MazeKey\n'
+     'pipeline.build_maze(MazeKey("circular", 20, "DFS", 0, 10, 2))'),
+    ('import app', 'import app', ''),
+)
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+{imports}
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, 'pygame' in sys.modules]))
+'''
+
+
+def cold_start(repo: str, imports: str, body: str):
+    """Seconds taken by one fresh interpreter, and whether it loaded pygame."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [repo, env.get('PYTHONPATH')]))
+    result = subprocess.run(
+        [sys.executable, '-c', SCRIPT.format(imports=imports, body=body)],
+        cwd=repo, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repo', default=os.getcwd())
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+    print(f'{"case":<18} {"median, ms":>11} {"min, ms":>9} {"pygame":>7}')
+    for name, imports, body in CASES:
+        runs = [cold_start(args.repo, imports, body)
+                for _ in range(args.runs)]
+        if None in runs:
+            print(f'{name:<18} {"failed":>11}')
+            continue
+        times = [seconds * 1000 for seconds, _ in runs]
+        print(f'{name:<18} {statistics.median(times):>11.1f} '
+              f'{min(times):>9.1f} {"yes" if runs[0][1] else "no":>7}')
+
+
+if __name__ == '__main__':
+    main()
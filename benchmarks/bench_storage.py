@@ -0,0 +1,70 @@
+"""Save/load throughput of the binary format against the old JSON saves.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_storage [side ...]
+
+Each side length builds a ``side x side`` RectMaze; JSON is only timed
+up to 1M cells because it gets very slow past that.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import storage
+from Maze import Headless, RectMaze
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def save_json(maze, path):
+    with open(path, 'w') as file:
+        json.dump((maze.shape, *maze.params), file)
+        file.write('\n')
+        e_cells = {str(cords): cell.encode_cell()
+                   for cords, cell in maze.cells.items()}
+        json.dump((e_cells, maze.entrance, maze.exit, 10, 2), file)
+
+
+def bench(side: int, directory: str):
+    maze = RectMaze(side, side, seed=0)
+    maze.generate_maze_dfs(Headless)
+    maze.set_exit((side - 1, side - 1))
+    cells = side * side
+    path = os.path.join(directory, 'maze.maze')
+    results = [('binary save', *_timed(storage.save_binary, maze, path, 10, 2))]
+    size = os.path.getsize(path)
+    results.append(('binary load (mmap)', *_timed(storage.load_binary, path)))
+    results.append(('binary load (copy)',
+                    *_timed(storage.load_binary, path, True)))
+    for name, seconds, _ in results:
+        yield name, cells, size, seconds
+    if cells <= 1_000_000:
+        path = os.path.join(directory, 'maze.json')
+        seconds, _ = _timed(save_json, maze, path)
+        size = os.path.getsize(path)
+        yield 'json save', cells, size, seconds
+        seconds, _ = _timed(storage.load_json_save, path)
+        yield 'json load', cells, size, seconds
+
+
+def main(*sides: int):
+    sides = sides or (1000, 2000)
+    print(f'{"operation":<20} {"cells":>9} {"bytes":>11} {"seconds":>8} '
+          f'{"Mcells/s":>9} {"MB/s":>8}')
+    with tempfile.TemporaryDirectory() as directory:
+        for side in sides:
+            for name, cells, size, seconds in bench(side, directory):
+                print(f'{name:<20} {cells:>9} {size:>11} {seconds:>8.3f} '
+                      f'{cells / seconds / 1e6:>9.2f} '
+                      f'{size / seconds / 1e6:>8.1f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,205 @@
+"""Fixed-seed benchmark sweep over algorithms, sizes and pipeline stages.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_suite --out results.json
+    python -m benchmarks.bench_suite --quick --algorithm DFS Prims
+    python -m benchmarks.bench_suite --compare old.json new.json
+
+Every maze goes through generate, solve, render (PNG and SVG), save and
+load. The sweep runs twice. The first pass measures wall time. The
+second pass runs under tracemalloc and records each stage's peak
+traced memory and the net change in allocated blocks; tracing would
+distort the timings, so they are kept apart. Results are written as
+JSON so runs on different commits can be compared with ``--compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import storage
+from Maze import Headless, Maze
+from algorithms import algorithms_for
+from pipeline import default_exit
+from render import iter_svg, render_png
+
+
+RADII = (10, 30, 100, 300, 1000)
+RECT_SIDES = (100, 500, 1000, 2000)
+QUICK_RADII = (10, 30, 100)
+QUICK_RECT_SIDES = (100, 300)
+
+
+def iter_stages(shape: str, params: tuple, algorithm: str, seed: int,
+                cell_size: int, wall_width: int, directory: str,
+                state: dict) -> Iterator[Tuple[str, Callable[[], object]]]:
+    """Yield ``(stage, run)`` pairs; each ``run`` must be called in order."""
+    path = os.path.join(directory, 'bench.maze')
+
+    def generate():
+        maze = state['maze'] = Maze.create(shape, params, seed)
+        maze.generate(Headless, algorithm)
+
+    def solve():
+        maze = state['maze']
+        maze.set_exit(default_exit(maze))
+        maze.calculate_path()
+
+    def png():
+        render_png(state['maze'], cell_size, wall_width, with_path=True)
+
+    def svg():
+        for _ in iter_svg(state['maze'], cell_size, wall_width, True):
+            pass
+
+    yield 'generate', generate
+    yield 'solve', solve
+    yield 'render_png', png
+    yield 'render_svg', svg
+    yield 'save', lambda: storage.save_binary(state['maze'], path,
+                                              cell_size, wall_width)
+    yield 'load', lambda: storage.load_binary(path, copy=True)
+
+
+def measure(shape: str, params: tuple, algorithm: str, seed: int,
+            cell_size: int, wall_width: int, memory: bool = True) \
+        -> List[Dict[str, object]]:
+    results = {}
+    state = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for stage, run in iter_stages(shape, params, algorithm, seed,
+                                      cell_size, wall_width, directory,
+                                      state):
+            start = time.perf_counter()
+            run()
+            results[stage] = {'seconds': time.perf_counter() - start}
+        if memory:
+            tracemalloc.start()
+            try:
+                for stage, run in iter_stages(shape, params, algorithm, seed,
+                                              cell_size, wall_width,
+                                              directory, {}):
+                    tracemalloc.reset_peak()
+                    base, _ = tracemalloc.get_traced_memory()
+                    blocks = sys.getallocatedblocks()
+                    run()
+                    _, peak = tracemalloc.get_traced_memory()
+                    results[stage]['peak_bytes'] = peak - base
+                    results[stage]['net_blocks'] = \
+                        sys.getallocatedblocks() - blocks
+            finally:
+                tracemalloc.stop()
+    cells = state['maze'].cell_count
+    return [{'shape': shape, 'size': list(params), 'algorithm': algorithm,
+             'seed': seed, 'cells': cells, 'stage': stage, **values}
+            for stage, values in results.items()]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(cases: List[Tuple[str, tuple]], algorithms: Optional[List[str]],
+              seed: int = 0, cell_size: int = 4, wall_width: int = 1,
+              memory: bool = True, log=print) -> Dict[str, object]:
+    results = []
+    for shape, params in cases:
+        names = [algorithm.name for algorithm in algorithms_for(shape)
+                 if algorithms is None or algorithm.name in algorithms]
+        for algorithm in names:
+            rows = measure(shape, params, algorithm, seed, cell_size,
+                           wall_width, memory)
+            if log is not None:
+                for row in rows:
+                    log(_format_row(row))
+            results.extend(rows)
+    return {'commit': _git_commit(), 'time': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(), 'seed': seed,
+            'cell_size': cell_size, 'wall_width': wall_width,
+            'results': results}
+
+
+def _case_name(row: Dict[str, object]) -> str:
+    size = 'x'.join(map(str, row['size']))
+    return f'{row["shape"]}-{size}-{row["algorithm"]}-{row["stage"]}'
+
+
+def _format_row(row: Dict[str, object]) -> str:
+    memory = ''
+    if 'peak_bytes' in row:
+        memory = (f' {row["peak_bytes"] / 2 ** 20:>9.2f} MiB'
+                  f' {row["net_blocks"]:>+10}')
+    return (f'{_case_name(row):<40} {row["cells"]:>9} '
+            f'{row["seconds"]:>9.4f} s{memory}')
+
+
+def compare(old_path: str, new_path: str):
+    """Print the time and peak memory ratios of two result files."""
+    with open(old_path) as file:
+        old = {_case_name(row): row for row in json.load(file)['results']}
+    with open(new_path) as file:
+        new = {_case_name(row): row for row in json.load(file)['results']}
+    print(f'{"case":<40} {"old, s":>9} {"new, s":>9} {"time":>7} {"memory":>7}')
+    for name in sorted(old.keys() & new.keys()):
+        before, after = old[name], new[name]
+        time_ratio = after['seconds'] / before['seconds'] \
+            if before['seconds'] else float('nan')
+        memory_ratio = ''
+        if before.get('peak_bytes') and 'peak_bytes' in after:
+            memory_ratio = f'{after["peak_bytes"] / before["peak_bytes"]:.2f}x'
+        print(f'{name:<40} {before["seconds"]:>9.4f} {after["seconds"]:>9.4f} '
+              f'{time_ratio:>6.2f}x {memory_ratio:>7}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--radius', type=int, nargs='*')
+    parser.add_argument('--polar', action='store_true',
+                        help='also run polar mazes with as many rings as '
+                             'each radius')
+    parser.add_argument('--rect', type=int, nargs='*',
+                        help='side lengths of square rectangular mazes')
+    parser.add_argument('--quick', action='store_true',
+                        help='small sizes only')
+    parser.add_argument('--algorithm', nargs='+')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cell-size', type=int, default=4)
+    parser.add_argument('--wall-width', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the tracemalloc pass')
+    parser.add_argument('--out', help='write the results to this JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+    radii = args.radius if args.radius is not None else \
+        QUICK_RADII if args.quick else RADII
+    sides = args.rect if args.rect is not None else \
+        QUICK_RECT_SIDES if args.quick else RECT_SIDES
+    cases = [('circular', (radius,)) for radius in radii] + \
+        [('rectangular', (side, side)) for side in sides]
+    if args.polar:
+        cases += [('polar', (radius,)) for radius in radii]
+    report = run_suite(cases, args.algorithm, args.seed, args.cell_size,
+                       args.wall_width, not args.no_memory)
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=1)
+
+
+if __name__ == '__main__':
+    main()
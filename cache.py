@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple, Union
+
+from Maze import Maze
+
+
+class MazeKey(NamedTuple):
+    shape: str
+    size: Union[int, Tuple[int, int]]
+    algorithm: str
+    seed: int
+    cell_size: int
+    wall_width: int
+
+
+class ImageKey(NamedTuple):
+    """An encoded image of a maze other than its full-size PNG."""
+    maze: MazeKey
+    image_format: str
+    max_side: Optional[int]
+
+
+class CachedMaze(NamedTuple):
+    maze: Maze
+    image: bytes
+
+    @property
+    def nbytes(self) -> int:
+        # The mask and neighbour tables are shared by every maze of the
+        # same shape and size (see Maze.share_tables) and not counted.
+        maze = self.maze
+        total = (len(maze.walls) + len(maze.cell_types) + len(maze.visited)
+                 + len(self.image))
+        solver = maze._solver
+        if solver is not None:
+            total += (len(solver.parent) * solver.parent.itemsize
+                      + len(solver.depth) * solver.depth.itemsize)
+        return total
+
+
+class MazeCache:
+    """Thread-safe LRU cache of generated mazes and their encoded images.
+
+    Besides the maze entries it keeps the other encodings of a maze,
+    keyed by ImageKey, under the same limits. Entries are evicted least
+    recently used first once either ``max_entries`` or ``max_bytes``
+    would be exceeded.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (entry, bytes it was charged when stored); a maze can
+        # grow later, e.g. when its solver is built, and eviction has to
+        # give back exactly what was added.
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Union[MazeKey, ImageKey]) -> bool:
+        return key in self._entries
+
+    def get(self, key: MazeKey) -> Optional[CachedMaze]:
+        return self._get(key)
+
+    def get_image(self, key: ImageKey) -> Optional[bytes]:
+        return self._get(key)
+
+    def put(self, key: MazeKey, maze: Maze, image: bytes) -> CachedMaze:
+        return self._put(key, CachedMaze(maze, image))
+
+    def put_image(self, key: ImageKey, image: bytes) -> bytes:
+        return self._put(key, image)
+
+    def _get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def _put(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            size = _nbytes(entry)
+            if size > self.max_bytes:
+                return entry
+            self._entries[key] = entry, size
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or \
+                    self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+def _nbytes(entry: Union[CachedMaze, bytes]) -> int:
+    return entry.nbytes if isinstance(entry, CachedMaze) else len(entry)
@@ -0,0 +1,133 @@
+"""Counters and stage timings for the generate, solve and render pipeline.
+
+Worker processes record into their own ``Metrics`` and hand a
+``snapshot()`` back with their result; the web process ``merge``s it
+into ``REGISTRY``, which ``/metrics`` renders in the Prometheus text
+format.
+"""
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+Series = Tuple[str, Labels]
+
+
+def _series(name: str, labels: Dict[str, object]) -> Series:
+    return name, tuple(sorted((key, str(value))
+                              for key, value in labels.items()))
+
+
+class Metrics:
+    """Thread-safe counters, gauges and count/sum summaries."""
+
+    def __init__(self, prefix: str = 'maze_'):
+        self.prefix = prefix
+        self.counters: Dict[Series, float] = {}
+        self.gauges: Dict[Series, float] = {}
+        self.summaries: Dict[Series, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        series = _series(name, labels)
+        with self._lock:
+            self.counters[series] = self.counters.get(series, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[_series(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        series = _series(name, labels)
+        with self._lock:
+            summary = self.summaries.setdefault(series, [0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body as one observation of ``stage_seconds{stage=name}``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - start,
+                         stage=name)
+
+    def snapshot(self) -> Tuple[dict, dict, dict]:
+        with self._lock:
+            return (dict(self.counters), dict(self.gauges),
+                    {series: list(summary)
+                     for series, summary in self.summaries.items()})
+
+    def merge(self, snapshot: Tuple[dict, dict, dict]):
+        """Add in another snapshot; gauges keep the larger value."""
+        counters, gauges, summaries = snapshot
+        with self._lock:
+            for series, value in counters.items():
+                self.counters[series] = self.counters.get(series, 0) + value
+            for series, value in gauges.items():
+                self.gauges[series] = max(self.gauges.get(series, value),
+                                          value)
+            for series, (count, total) in summaries.items():
+                summary = self.summaries.setdefault(series, [0, 0.0])
+                summary[0] += count
+                summary[1] += total
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.summaries.clear()
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format."""
+        counters, gauges, summaries = self.snapshot()
+        lines = []
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            for name, series in _by_name(values):
+                lines.append(f'# TYPE {self.prefix}{name} {kind}')
+                for labels, value in series:
+                    lines.append(f'{self.prefix}{name}{_labels(labels)} '
+                                 f'{value:g}')
+        for name, series in _by_name(summaries):
+            lines.append(f'# TYPE {self.prefix}{name} summary')
+            for labels, (count, total) in series:
+                lines.append(f'{self.prefix}{name}_count{_labels(labels)} '
+                             f'{count:g}')
+                lines.append(f'{self.prefix}{name}_sum{_labels(labels)} '
+                             f'{total:.6f}')
+        return '\n'.join(lines) + '\n'
+
+
+def _by_name(values: Dict[Series, object]):
+    grouped: Dict[str, list] = {}
+    for (name, labels), value in sorted(values.items()):
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped.items()
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+@contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """Run the body under cProfile and dump the stats to ``path``, if any."""
+    if path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+
+
+REGISTRY = Metrics()
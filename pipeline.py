@@ -0,0 +1,340 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Maze import Headless, Maze
+from cache import CachedMaze, ImageKey, MazeCache, MazeKey
+from metrics import REGISTRY, Metrics, profiled
+from render import encode, webp_supported
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+def create_maze(key: MazeKey, metrics: Metrics = REGISTRY) -> Maze:
+    params = key.size if isinstance(key.size, tuple) else (key.size,)
+    maze = Maze.create(key.shape, params, key.seed)
+    with metrics.stage('generate'):
+        carved = maze.generate(Headless, key.algorithm)
+    metrics.inc('mazes_generated_total', algorithm=key.algorithm)
+    metrics.inc('cells_carved_total', carved, algorithm=key.algorithm)
+    if maze.frontier_peak:
+        metrics.set('frontier_peak', maze.frontier_peak,
+                    algorithm=key.algorithm)
+    return maze
+
+
+def default_exit(maze: Maze) -> Tuple[int, int]:
+    """The rightmost cell of the middle row, the far corner of a rectangle
+    or the first cell of a polar maze's outer ring."""
+    if maze.shape == 'polar':
+        return maze.rings - 1, 0
+    if maze.shape == 'circular':
+        return maze.cols - 1, maze.rows // 2
+    return maze.cols - 1, maze.rows - 1
+
+
+def solve_maze(maze: Maze, start: Optional[Tuple[int, int]] = None,
+               end: Optional[Tuple[int, int]] = None,
+               metrics: Metrics = REGISTRY) -> List[int]:
+    """Cell indices from ``start`` to ``end`` without touching cell types.
+
+    Cached mazes are shared between requests, so this only reads the
+    maze (and its lazily built solver) instead of calling
+    ``calculate_path``.
+    """
+    start = maze.entrance if start is None else start
+    end = (maze.exit or default_exit(maze)) if end is None else end
+    with metrics.stage('solve'):
+        path = maze.solver.path(maze.index(start), maze.index(end))
+    metrics.inc('path_cells_total', len(path))
+    return path
+
+
+IMAGE_TYPES = {'webp': 'image/webp', 'png': 'image/png',
+               'svg': 'image/svg+xml'}
+
+
+def image_formats(thumbnail: bool = False) -> List[str]:
+    """Formats the server can encode, most preferred first."""
+    formats = ['webp', 'png'] if webp_supported() else ['png']
+    return formats if thumbnail else formats + ['svg']
+
+
+def negotiate(accept: Optional[str], formats: List[str]) -> Optional[str]:
+    """The format whose media type ``accept`` rates highest.
+
+    Wildcards count like exact types and ties go to the earlier entry
+    of ``formats``; without an Accept header that is the first one.
+    Returns None when the client accepts none of them.
+    """
+    if not accept:
+        return formats[0] if formats else None
+    ratings: Dict[str, float] = {}
+    for item in accept.split(','):
+        media, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ratings[media.lower()] = max(quality, ratings.get(media.lower(), 0))
+    best, best_quality = None, 0.0
+    for image_format in formats:
+        media = IMAGE_TYPES[image_format]
+        quality = max(ratings.get(media, 0), ratings.get('image/*', 0),
+                      ratings.get('*/*', 0))
+        if quality > best_quality:
+            best, best_quality = image_format, quality
+    return best
+
+
+def encode_image(maze: Maze, image_format: str, cell_size: int,
+                 wall_width: int, with_path: bool = False,
+                 max_side: Optional[int] = None,
+                 metrics: Metrics = REGISTRY) -> bytes:
+    """``render.encode`` with its time and output size recorded per format;
+    thumbnails are counted as ``<format>_thumb``."""
+    kind = image_format if max_side is None else f'{image_format}_thumb'
+    start = time.perf_counter()
+    with metrics.stage('render'):
+        image = encode(maze, image_format, cell_size, wall_width, with_path,
+                       max_side)
+    metrics.observe('encode_seconds', time.perf_counter() - start, kind=kind)
+    metrics.inc('render_calls_total', kind=kind)
+    metrics.inc('bytes_written_total', len(image), kind=kind)
+    return image
+
+
+def encode_png(maze: Maze, cell_size: int, wall_width: int,
+               with_path: bool = False, metrics: Metrics = REGISTRY) -> bytes:
+    return encode_image(maze, 'png', cell_size, wall_width, with_path,
+                        metrics=metrics)
+
+
+def build_maze(key: MazeKey, with_image: bool = True,
+               profile_path: Optional[str] = None) \
+        -> Tuple[Maze, bytes, tuple]:
+    """Generate and render one maze; runs inside a worker process.
+
+    Returns the metrics recorded for this build alongside the result so
+    the parent process can merge them.
+    """
+    metrics = Metrics()
+    with profiled(profile_path):
+        maze = create_maze(key, metrics)
+        image = encode_png(maze, key.cell_size, key.wall_width,
+                           metrics=metrics) if with_image else b''
+    return maze, image, metrics.snapshot()
+
+
+def encode_maze(maze: Maze, image_key: ImageKey,
+                profile_path: Optional[str] = None) -> Tuple[bytes, tuple]:
+    """Encode one image of a built maze; runs inside a worker process."""
+    metrics = Metrics()
+    key = image_key.maze
+    with profiled(profile_path):
+        image = encode_image(maze, image_key.image_format, key.cell_size,
+                             key.wall_width, max_side=image_key.max_side,
+                             metrics=metrics)
+    return image, metrics.snapshot()
+
+
+class MazeService:
+    """Serves mazes from the cache, building misses in a process pool.
+
+    Images other than the one a build renders are encoded in the same
+    pool. At most ``max_pending`` jobs may be queued or running at once;
+    further requests wait up to ``timeout`` seconds for a slot and then
+    raise ServiceBusy. Concurrent requests for the same key share one
+    build, and finished builds go into the cache even when nobody is
+    waiting for them any more.
+    """
+
+    def __init__(self, cache: MazeCache, max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, timeout: float = 30,
+                 metrics: Metrics = REGISTRY):
+        self.cache = cache
+        self.metrics = metrics
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(
+            max_pending or self.max_workers * 2)
+        # Running jobs by (key, with_image) for builds, ImageKey for images.
+        self._pending: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            return self._executor
+
+    def get(self, key: MazeKey, with_image: bool = True,
+            profile_path: Optional[str] = None) -> CachedMaze:
+        """Return the cached maze for ``key``, building it on a miss.
+
+        With ``profile_path`` set, a build started by this call is run
+        under cProfile in the worker and its stats are dumped there.
+        """
+        entry = self._cached(key, with_image)
+        if entry is not None:
+            return entry
+        return self._build(key, with_image, profile_path).result(self.timeout)
+
+    def image(self, key: MazeKey, image_format: str,
+              max_side: Optional[int] = None,
+              profile_path: Optional[str] = None) -> bytes:
+        """The maze for ``key`` encoded as ``image_format``.
+
+        Images are encoded in the worker pool, like builds, and cached
+        next to the maze. The full-size PNG of a maze that was built
+        with its image is served from the maze's own entry.
+        """
+        if image_format == 'png' and max_side is None:
+            entry = self._cached(key, True)
+            if entry is not None:
+                return entry.image
+        image_key = ImageKey(key, image_format, max_side)
+        image = self.cache.get_image(image_key)
+        if image is not None:
+            return image
+        maze = self.get(key, False, profile_path).maze
+        return self._start(image_key, encode_maze,
+                           (maze, image_key, profile_path),
+                           self._store_image(image_key)) \
+            .result(self.timeout)
+
+    def get_nowait(self, key: MazeKey,
+                   with_image: bool = True) -> Optional[CachedMaze]:
+        """Return the maze if it is ready, otherwise start its build.
+
+        Returns None while the build is running and raises ServiceBusy
+        instead of waiting when no build slot is free.
+        """
+        entry = self._cached(key, with_image)
+        if entry is not None:
+            return entry
+        future = self.submit(key, with_image)
+        return future.result() if future.done() else None
+
+    def submit(self, key: MazeKey, with_image: bool = True) -> Future:
+        """Start building ``key`` in the background if a slot is free.
+
+        The returned future holds the cached entry once the build is
+        done, or fails with ServiceBusy straight away.
+        """
+        return self._build(key, with_image, slot_timeout=0)
+
+    def _cached(self, key: MazeKey, with_image: bool) -> Optional[CachedMaze]:
+        entry = self.cache.get(key)
+        if entry is not None and (entry.image or not with_image):
+            return entry
+        return None
+
+    def _build(self, key: MazeKey, with_image: bool,
+               profile_path: Optional[str] = None,
+               slot_timeout: Optional[float] = None) -> Future:
+        return self._start((key, with_image), build_maze,
+                           (key, with_image, profile_path),
+                           self._store_maze(key), slot_timeout)
+
+    def _store_maze(self, key: MazeKey) -> Callable[[tuple], CachedMaze]:
+        def store(result: tuple) -> CachedMaze:
+            maze, image, stats = result
+            self.metrics.merge(stats)
+            return self.cache.put(key, maze, image)
+        return store
+
+    def _store_image(self, image_key: ImageKey) -> Callable[[tuple], bytes]:
+        def store(result: tuple) -> bytes:
+            image, stats = result
+            self.metrics.merge(stats)
+            return self.cache.put_image(image_key, image)
+        return store
+
+    def _start(self, job_key: tuple, function: Callable, args: tuple,
+               store: Callable[[tuple], object],
+               slot_timeout: Optional[float] = None) -> Future:
+        """Run ``function(*args)`` in the pool under a build slot.
+
+        Concurrent calls with the same ``job_key`` share one job; the
+        future holds what ``store`` makes of the job's result.
+        """
+        with self._lock:
+            future = self._pending.get(job_key)
+            if future is not None:
+                return future
+            future = Future()
+            self._pending[job_key] = future
+        if slot_timeout is None:
+            slot_timeout = self.timeout
+        if not self._slots.acquire(timeout=slot_timeout):
+            with self._lock:
+                self._pending.pop(job_key, None)
+            self.metrics.inc('rejected_total')
+            future.set_exception(
+                ServiceBusy('too many mazes are being generated'))
+            return future
+        try:
+            executor, job = self._submit(function, args)
+        except Exception as error:
+            with self._lock:
+                self._pending.pop(job_key, None)
+            self._slots.release()
+            self.metrics.inc('build_errors_total')
+            future.set_exception(error)
+            return future
+        job.add_done_callback(
+            lambda done: self._finish(job_key, done, future, executor,
+                                      store))
+        return future
+
+    def _submit(self, function: Callable, args: tuple) \
+            -> Tuple[ProcessPoolExecutor, Future]:
+        """Submit a job, replacing the pool once if a worker died."""
+        executor = self.executor
+        try:
+            return executor, executor.submit(function, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+        executor = self.executor
+        return executor, executor.submit(function, *args)
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Forget a broken pool so the next build starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _finish(self, job_key: tuple, job: Future, future: Future,
+                executor: ProcessPoolExecutor,
+                store: Callable[[tuple], object]):
+        with self._lock:
+            self._pending.pop(job_key, None)
+        self._slots.release()
+        if job.exception() is not None:
+            self.metrics.inc('build_errors_total')
+            if isinstance(job.exception(), BrokenProcessPool):
+                self._discard(executor)
+            future.set_exception(job.exception())
+        else:
+            future.set_result(store(job.result()))
+
+    def shutdown(self):
+        # Finished builds take the lock in _finish, so shutting the pool
+        # down while holding it would wait on them forever.
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
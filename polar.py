@@ -0,0 +1,229 @@
+"""Polar mazes: concentric rings of cells around a single centre cell.
+
+Ring ``r`` of a maze with ``rings`` rings spans the radii ``[r, r + 1)``
+in ring widths. Every ring splits each cell of the ring inside it into
+as many cells as keep them roughly square, so the cell count per ring
+grows with the circumference. Cells are numbered ring by ring, starting
+at the centre, and a cell's coordinates are ``(ring, position)``.
+
+Each cell owns two walls: the arc towards the centre (``INWARD``) and
+the radial line on its clockwise side (``CLOCKWISE``). The wall masks
+keep using one byte per cell in ``Maze.walls``, so storage and the
+registry generators work unchanged.
+"""
+import functools
+import math
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from Maze import CellType, Maze
+
+INWARD = 1
+CLOCKWISE = 2
+
+
+class PolarLayout(NamedTuple):
+    """Ring geometry and the flattened neighbour table of a polar maze.
+
+    The neighbours of cell ``c`` in ring ``r`` are
+    ``neighbours[offsets[r] + (c - starts[r]) * degrees[r]:][:degrees[r]]``,
+    in the order inward, clockwise, counter-clockwise, then outward.
+    """
+    rings: int
+    counts: Tuple[int, ...]
+    starts: Tuple[int, ...]
+    degrees: Tuple[int, ...]
+    offsets: Tuple[int, ...]
+    neighbours: array
+
+    @property
+    def size(self) -> int:
+        return self.starts[-1]
+
+
+def ring_counts(rings: int) -> Tuple[int, ...]:
+    counts = [1]
+    for ring in range(1, rings):
+        previous = counts[-1]
+        ratio = max(round(2 * math.pi * ring / previous), 1)
+        counts.append(previous * ratio)
+    return tuple(counts)
+
+
+@functools.lru_cache(maxsize=4)
+def polar_layout(rings: int) -> PolarLayout:
+    counts = ring_counts(rings)
+    starts = [0]
+    for count in counts:
+        starts.append(starts[-1] + count)
+    degrees = []
+    offsets = []
+    neighbours = array('i')
+    for ring, count in enumerate(counts):
+        start = starts[ring]
+        outward = counts[ring + 1] // count if ring + 1 < rings else 0
+        offsets.append(len(neighbours))
+        if ring == 0:
+            degrees.append(outward)
+            neighbours.extend(range(starts[1], starts[1] + outward))
+            continue
+        inward = count // counts[ring - 1]
+        inner_start = starts[ring - 1]
+        outer_start = starts[ring + 1] if outward else 0
+        degrees.append(3 + outward)
+        row = []
+        for position in range(count):
+            row.append(inner_start + position // inward)
+            row.append(start + (position + 1) % count)
+            row.append(start + (position - 1) % count)
+            first = outer_start + position * outward
+            row.extend(range(first, first + outward))
+        neighbours.extend(row)
+    return PolarLayout(rings, counts, tuple(starts), tuple(degrees),
+                       tuple(offsets), neighbours)
+
+
+class PolarMaze(Maze):
+    shape = 'polar'
+    shared_tables = ('layout',)
+    rings: int
+    layout: PolarLayout
+
+    def __init__(self, rings: int, seed: Optional[int] = None):
+        super().__init__(seed)
+        self.rings = rings
+        self.share_tables()
+        # One row of cells in ring order; keeps reset_grid and the
+        # binary save format shape-agnostic.
+        self.allocate(self.layout.size, 1)
+        self.entrance = (0, 0)
+        self.cell_types[0] = CellType.IN
+
+    def share_tables(self):
+        self.layout = polar_layout(self.rings)
+
+    def reset(self):
+        self.reset_grid()
+        self.set_enter(self.entrance)
+        if self.exit is not None:
+            self.set_exit(self.exit)
+
+    @property
+    def params(self) -> Tuple[int]:
+        return self.rings,
+
+    @property
+    def cells(self):
+        raise TypeError('polar mazes have no grid cell view')
+
+    @property
+    def cell_count(self) -> int:
+        return self.layout.size
+
+    def ring(self, index: int) -> int:
+        return bisect_right(self.layout.starts, index) - 1
+
+    def index(self, cords: Tuple[int, int]) -> int:
+        return self.layout.starts[cords[0]] + cords[1]
+
+    def cords(self, index: int) -> Tuple[int, int]:
+        ring = self.ring(index)
+        return ring, index - self.layout.starts[ring]
+
+    def contains(self, cords: Tuple[int, int]) -> bool:
+        ring, position = cords
+        return 0 <= ring < self.rings and \
+            0 <= position < self.layout.counts[ring]
+
+    def neighbour_indices(self, index: int) -> List[int]:
+        layout = self.layout
+        ring = bisect_right(layout.starts, index) - 1
+        degree = layout.degrees[ring]
+        first = layout.offsets[ring] + (index - layout.starts[ring]) * degree
+        return layout.neighbours[first:first + degree].tolist()
+
+    def wall(self, first: int, second: int) -> Tuple[int, int]:
+        """``(owner, bit)`` of the wall between two neighbouring cells."""
+        ring = self.ring(first)
+        return self._wall(first, second, self.layout.starts[ring],
+                          self.layout.counts[ring])
+
+    @staticmethod
+    def _wall(index: int, neighbour: int, start: int,
+              count: int) -> Tuple[int, int]:
+        # ``start`` and ``count`` describe the ring of ``index``.
+        if neighbour < start:
+            return index, INWARD
+        if neighbour >= start + count:
+            return neighbour, INWARD
+        if neighbour == start + (index - start + 1) % count:
+            return index, CLOCKWISE
+        return neighbour, CLOCKWISE
+
+    def carve(self, first: int, second: int):
+        owner, bit = self.wall(first, second)
+        self.walls[owner] &= ~bit
+
+    def passages(self, index: int) -> Iterator[int]:
+        """Neighbours reachable from ``index`` without crossing a wall."""
+        layout = self.layout
+        walls = self.walls
+        ring = bisect_right(layout.starts, index) - 1
+        start, count = layout.starts[ring], layout.counts[ring]
+        degree = layout.degrees[ring]
+        first = layout.offsets[ring] + (index - start) * degree
+        for neighbour in layout.neighbours[first:first + degree]:
+            owner, bit = self._wall(index, neighbour, start, count)
+            if not walls[owner] & bit:
+                yield neighbour
+
+    def iter_maze_prims(self, starting_cords: Tuple[int, int] = None,
+                        seed: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Prim's over the neighbour table, yielding every carved pair."""
+        if starting_cords is None:
+            starting_cords = self.entrance
+        if seed is not None:
+            self.random.seed(seed)
+        self._solver = None
+        visited = self.visited
+        neighbour_indices = self.neighbour_indices
+        randrange = self.random.randrange
+        size = len(self.walls)
+        # Frontier edges, encoded as cell * size + neighbour, as in
+        # Maze.iter_maze_prims.
+        frontier: List[int] = []
+        position: Dict[int, int] = {}
+
+        def remove(slot: int):
+            last = frontier.pop()
+            if slot < len(frontier):
+                frontier[slot] = last
+                position[last] = slot
+
+        def add(cell: int):
+            visited[cell] = 1
+            for neighbour in neighbour_indices(cell):
+                if visited[neighbour]:
+                    slot = position.pop(neighbour * size + cell, None)
+                    if slot is not None:
+                        remove(slot)
+                else:
+                    edge = cell * size + neighbour
+                    position[edge] = len(frontier)
+                    frontier.append(edge)
+
+        add(self.index(starting_cords))
+        peak = self.frontier_peak = len(frontier)
+        while frontier:
+            slot = randrange(len(frontier))
+            edge = frontier[slot]
+            del position[edge]
+            remove(slot)
+            cur, next_cell = divmod(edge, size)
+            self.carve(cur, next_cell)
+            add(next_cell)
+            if len(frontier) > peak:
+                peak = len(frontier)
+                self.frontier_peak = peak
+            yield cur, next_cell
@@ -0,0 +1,173 @@
+import random
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Set, \
+    Tuple
+
+from cache import CachedMaze, MazeKey
+from pipeline import MazeService
+
+
+class PoolProfile(NamedTuple):
+    """The parameters of a request that leaves the seed to the server."""
+    shape: str
+    size: int
+    algorithm: str
+    cell_size: int
+    wall_width: int
+
+    def key(self, seed: int) -> MazeKey:
+        return MazeKey(self.shape, self.size, self.algorithm, seed,
+                       self.cell_size, self.wall_width)
+
+
+class MazePool:
+    """Ready-made mazes for the profiles requested most often.
+
+    Every ``take`` counts towards its profile's popularity; counts are
+    halved every ``decay_every`` requests so the pool follows what is
+    asked for now. A background thread keeps up to ``depth`` built
+    mazes, with images, for each of the ``max_profiles`` most popular
+    profiles. It builds them through the service one or a few at a
+    time (``max_building``), so it never takes more than its share of
+    the build slots from requests that have to wait for their maze.
+    """
+
+    def __init__(self, service: MazeService, max_profiles: int = 8,
+                 depth: int = 2, max_building: int = 1,
+                 interval: float = 5, decay_every: int = 1000,
+                 max_history: int = 256):
+        self.service = service
+        self.max_profiles = max_profiles
+        self.depth = depth
+        self.max_building = max_building
+        self.interval = interval
+        self.decay_every = decay_every
+        self.max_history = max_history
+        self.hits = 0
+        self.misses = 0
+        self.random = random.Random()
+        self._history: Counter = Counter()
+        self._recorded = 0
+        self._ready: Dict[PoolProfile,
+                          Deque[Tuple[MazeKey, CachedMaze]]] = {}
+        self._building: Counter = Counter()
+        self._wanted: Set[PoolProfile] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self):
+        with self._lock:
+            return sum(map(len, self._ready.values()))
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def take(self, profile: PoolProfile) \
+            -> Optional[Tuple[MazeKey, CachedMaze]]:
+        """A ready maze for ``profile`` and the key it was built with.
+
+        Returns None on a miss; either way the pool is refilled in the
+        background. A hit is put back into the service's cache so the
+        key keeps resolving, e.g. for the image URL.
+        """
+        with self._lock:
+            self._record(profile)
+            ready = self._ready.get(profile)
+            item = ready.popleft() if ready else None
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self.start()
+        self._wake.set()
+        if item is None:
+            return None
+        key, entry = item
+        return key, self.service.cache.put(key, entry.maze, entry.image)
+
+    def warm(self, profiles: Iterable[PoolProfile]):
+        """Count ``profiles`` as requested once, before any real request."""
+        with self._lock:
+            for profile in profiles:
+                self._record(profile)
+
+    def _record(self, profile: PoolProfile):
+        history = self._history
+        history[profile] += 1
+        self._recorded += 1
+        if self._recorded >= self.decay_every:
+            self._recorded = 0
+            for known in list(history):
+                history[known] //= 2
+                if not history[known]:
+                    del history[known]
+        if len(history) > self.max_history:
+            self._history = Counter(
+                dict(history.most_common(self.max_history)))
+
+    def popular(self) -> List[PoolProfile]:
+        with self._lock:
+            return [profile for profile, _ in
+                    self._history.most_common(self.max_profiles)]
+
+    def refill(self):
+        """Start builds for the popular profiles that are short of mazes."""
+        wanted = self.popular()
+        jobs = []
+        with self._lock:
+            self._wanted = set(wanted)
+            for profile in list(self._ready):
+                if profile not in self._wanted:
+                    del self._ready[profile]
+            room = self.max_building - sum(self._building.values())
+            for profile in wanted:
+                missing = self.depth - len(self._ready.get(profile, ())) - \
+                    self._building[profile]
+                while missing > 0 and room > 0:
+                    jobs.append(profile)
+                    self._building[profile] += 1
+                    missing -= 1
+                    room -= 1
+        for profile in jobs:
+            key = profile.key(self.random.randrange(2 ** 32))
+            self.service.submit(key).add_done_callback(
+                lambda future, profile=profile, key=key:
+                self._stock(profile, key, future))
+
+    def _stock(self, profile: PoolProfile, key: MazeKey, future: Future):
+        with self._lock:
+            self._building[profile] -= 1
+            if not self._building[profile]:
+                del self._building[profile]
+            if future.exception() is not None or profile not in self._wanted:
+                return
+            self._ready.setdefault(profile, deque()).append(
+                (key, future.result()))
+        self._wake.set()
+
+    def start(self):
+        """Run the refilling thread; called by the first ``take``."""
+        with self._lock:
+            if self._thread is not None or self._stopped.is_set():
+                return
+            self._thread = threading.Thread(target=self._run,
+                                            name='maze-pool', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.clear()
+            self.refill()
+            self._wake.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
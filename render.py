@@ -0,0 +1,754 @@
+import functools
+import io
+import math
+import struct
+import zlib
+from array import array
+from math import isqrt
+from typing import Callable, Iterator, Optional, Tuple
+
+from Maze import Maze, CellType, Directions, WALL_BITS
+from polar import CLOCKWISE, INWARD, polar_layout
+
+# Palette indices used by the raster backend.
+BACKGROUND = 0
+FLOOR = 1
+WALL = 2
+PATH = 3
+PALETTE = ((128, 128, 128), (0, 100, 0), (0, 0, 0), (0, 0, 255))
+
+TOP = WALL_BITS[Directions.TOP]
+RIGHT = WALL_BITS[Directions.RIGHT]
+BOTTOM = WALL_BITS[Directions.BOTTOM]
+LEFT = WALL_BITS[Directions.LEFT]
+
+# (walls, valid, cell_types) of one row of cells; valid is None when every
+# cell of the row exists.
+RowData = Tuple[bytes, Optional[bytes], bytes]
+
+
+def image_size(maze: Maze, cell_size: int, wall_width: int) -> Tuple[int, int]:
+    return shape_image_size(maze.shape, maze.params, cell_size, wall_width)
+
+
+def shape_image_size(shape: str, params, cell_size: int,
+                     wall_width: int) -> Tuple[int, int]:
+    """``image_size`` of a maze that has not been built yet."""
+    if shape == 'polar':
+        side = polar_side(params[0], cell_size, wall_width)
+        return side, side
+    if shape == 'circular':
+        cols = rows = params[0] * 2 - 1
+    else:
+        cols, rows = params
+    return cols * cell_size + wall_width // 2, rows * cell_size + wall_width // 2
+
+
+def polar_side(rings: int, ring_width: int, wall_width: int) -> int:
+    # Always even, so no pixel centre lies on the horizontal axis.
+    return 2 * rings * ring_width + 2 * ((wall_width + 1) // 2)
+
+
+def maze_rows(maze: Maze) -> Callable[[int], RowData]:
+    cols = maze.cols
+
+    def row(y: int) -> RowData:
+        start, end = y * cols, (y + 1) * cols
+        valid = None if maze.valid is None else maze.valid[start:end]
+        return maze.walls[start:end], valid, maze.cell_types[start:end]
+    return row
+
+
+def _runs(flags, first: int, last: int) -> Iterator[Tuple[int, int]]:
+    """Yield [start, end) runs of consecutive truthy ``flags[first:last]``."""
+    start = None
+    for x in range(first, last):
+        if flags[x]:
+            if start is None:
+                start = x
+        elif start is not None:
+            yield start, x
+            start = None
+    if start is not None:
+        yield start, last
+
+
+def iter_scanlines(row: Callable[[int], RowData], cols: int, rows: int,
+                   cell_size: int, wall_width: int, with_path: bool = False,
+                   x0: int = 0, y0: int = 0, width: int = None,
+                   height: int = None) -> Iterator[bytes]:
+    """Yield the palette-indexed pixel rows of a maze image.
+
+    Cell backgrounds, vertical walls and path markers are painted once per
+    row of cells into a template scanline, which is then reused for every
+    pixel row of that cell row; horizontal walls are overlaid as merged
+    spans. ``x0``, ``y0``, ``width`` and ``height`` select a pixel window
+    of the full image, so only the cells inside it are touched.
+    """
+    if width is None:
+        width = cols * cell_size + wall_width // 2 - x0
+    if height is None:
+        height = rows * cell_size + wall_width // 2 - y0
+    solid = [memoryview(bytes([color]) * width) for color in range(4)]
+    up = (wall_width - 1) // 2 if wall_width > 0 else 0
+    down = wall_width // 2 + 1 if wall_width > 0 else 0
+    dot_radius = cell_size // 4
+    dot_spans = [isqrt(dot_radius ** 2 - dy * dy)
+                 for dy in range(-dot_radius, dot_radius + 1)]
+    first_col = max((x0 - down) // cell_size, 0)
+    last_col = min((x0 + width + up) // cell_size + 1, cols)
+
+    def paint(line: bytearray, start: int, end: int, color: int):
+        start = max(start - x0, 0)
+        end = min(end - x0, width)
+        if start < end:
+            line[start:end] = solid[color][:end - start]
+
+    rows_cache = {}
+
+    def get_row(y: int) -> RowData:
+        if y not in rows_cache:
+            if len(rows_cache) > 4:
+                rows_cache.pop(min(rows_cache))
+            rows_cache[y] = row(y)
+        return rows_cache[y]
+
+    def template(y: int) -> bytes:
+        walls, valid, _ = get_row(y)
+        line = bytearray(solid[BACKGROUND])
+        exists = valid if valid is not None else b'\x01' * cols
+        for start, end in _runs(exists, first_col, last_col):
+            paint(line, start * cell_size, end * cell_size, FLOOR)
+        if wall_width > 0:
+            for x in range(first_col, last_col):
+                if not exists[x]:
+                    continue
+                if walls[x] & LEFT:
+                    px = x * cell_size
+                    paint(line, px - up, px + down, WALL)
+                if walls[x] & RIGHT:
+                    px = (x + 1) * cell_size
+                    paint(line, px - up, px + down, WALL)
+        return bytes(line)
+
+    def horizontal_walls(k: int):
+        """Merged [start, end) pixel spans of the wall line above cell row k."""
+        flags = bytearray(cols)
+        if k < rows:
+            walls, valid, _ = get_row(k)
+            for x in range(first_col, last_col):
+                if walls[x] & TOP and (valid is None or valid[x]):
+                    flags[x] = 1
+        if k > 0:
+            walls, valid, _ = get_row(k - 1)
+            for x in range(first_col, last_col):
+                if walls[x] & BOTTOM and (valid is None or valid[x]):
+                    flags[x] = 1
+        return [(start * cell_size, end * cell_size + 1)
+                for start, end in _runs(flags, first_col, last_col)]
+
+    def path_cells(y: int):
+        walls, valid, cell_types = get_row(y)
+        return [(x, walls[x]) for x in range(first_col, last_col)
+                if cell_types[x] == CellType.PATH]
+
+    cur_row = None
+    cur_template = None
+    cur_path = []
+    lines_cache = {}
+    for py in range(y0, y0 + height):
+        y = py // cell_size
+        if y != cur_row:
+            cur_row = y
+            if y < rows:
+                cur_template = template(y)
+                cur_path = path_cells(y) if with_path else []
+            else:
+                cur_template = bytes(solid[BACKGROUND])
+                cur_path = []
+            lines_cache = {k: spans for k, spans in lines_cache.items()
+                           if k >= y - 1}
+        line = None
+        if cur_path:
+            dy = py - (y * cell_size + cell_size // 2)
+            if -dot_radius <= dy <= dot_radius:
+                half = dot_spans[dy + dot_radius]
+                line = bytearray(cur_template)
+                for x, walls in cur_path:
+                    center = x * cell_size + cell_size // 2
+                    start, end = center - half, center + half + 1
+                    if walls & LEFT:
+                        start = max(start, x * cell_size + down)
+                    if walls & RIGHT:
+                        end = min(end, (x + 1) * cell_size - up)
+                    paint(line, start, end, PATH)
+        if wall_width > 0:
+            for k in range(max((py - down + 1) // cell_size, 0),
+                           min((py + up) // cell_size, rows) + 1):
+                if not k * cell_size - up <= py < k * cell_size + down:
+                    continue
+                if k not in lines_cache:
+                    lines_cache[k] = horizontal_walls(k)
+                for start, end in lines_cache[k]:
+                    if line is None:
+                        line = bytearray(cur_template)
+                    paint(line, start, end, WALL)
+        yield cur_template if line is None else bytes(line)
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def _bit_depth(colors: int) -> int:
+    for depth in (1, 2, 4):
+        if colors <= 1 << depth:
+            return depth
+    return 8
+
+
+def _packer(width: int, bit_depth: int) -> Callable[[bytes], bytes]:
+    """Pack a row of one palette index per byte into ``bit_depth`` bits."""
+    if bit_depth == 8:
+        return bytes
+    per_byte = 8 // bit_depth
+    padding = bytes(-width % per_byte)
+    size = (width + len(padding)) // per_byte
+
+    def pack(line: bytes) -> bytes:
+        line = bytes(line) + padding
+        # Every index is below 1 << bit_depth, so shifting the k-th pixel
+        # of each group into its bits never spills into the next byte.
+        packed = 0
+        for k in range(per_byte):
+            packed |= int.from_bytes(line[k::per_byte], 'big') << \
+                (8 - bit_depth * (k + 1))
+        return packed.to_bytes(size, 'big')
+    return pack
+
+
+def iter_png(scanlines: Iterator[bytes], width: int, height: int,
+             palette=PALETTE, level: int = 6) -> Iterator[bytes]:
+    """Encode palette-indexed scanlines as an indexed PNG, chunk by chunk.
+
+    The bit depth is the smallest that holds the palette, two bits for
+    the four colours of ``PALETTE``. Renderers repeat one row object
+    for identical rows, so the last packed row is reused.
+    """
+    bit_depth = _bit_depth(len(palette))
+    pack = _packer(width, bit_depth)
+    yield b'\x89PNG\r\n\x1a\n'
+    yield _chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth,
+                                      3, 0, 0, 0))
+    yield _chunk(b'PLTE', b''.join(bytes(color) for color in palette))
+    compressor = zlib.compressobj(level)
+    pending = []
+    pending_size = 0
+    last = packed = None
+    for line in scanlines:
+        if line is not last:
+            last, packed = line, pack(line)
+        pending.append(compressor.compress(b'\x00'))
+        pending.append(compressor.compress(packed))
+        pending_size += len(packed)
+        if pending_size >= 1 << 18:
+            data = b''.join(pending)
+            if data:
+                yield _chunk(b'IDAT', data)
+            pending = []
+            pending_size = 0
+    pending.append(compressor.flush())
+    yield _chunk(b'IDAT', b''.join(pending))
+    yield _chunk(b'IEND', b'')
+
+
+def thumbnail_geometry(maze: Maze, cell_size: int, wall_width: int,
+                       max_side: int) -> Tuple[int, int, int]:
+    """``(cell_size, wall_width, stride)`` of an image at most ``max_side``
+    pixels across.
+
+    The image is drawn with proportionally smaller cells while they
+    stay at least two pixels wide; beyond that it is drawn with
+    two-pixel cells and only every ``stride``-th row and column is kept.
+    """
+    side = max(image_size(maze, cell_size, wall_width))
+    if side <= max_side:
+        return cell_size, wall_width, 1
+    scale = max_side / side
+    small = int(cell_size * scale)
+    if small >= 2:
+        return small, max(min(round(wall_width * scale), small - 1), 1), 1
+    side = max(image_size(maze, 2, 1))
+    return 2, 1, -(-side // max_side)
+
+
+def raster(maze: Maze, cell_size: int, wall_width: int,
+           with_path: bool = False, max_side: Optional[int] = None) \
+        -> Tuple[Iterator[bytes], int, int]:
+    """Palette-indexed scanlines of ``maze`` and the image's size.
+
+    With ``max_side`` the image is shrunk to a thumbnail that fits.
+    """
+    stride = 1
+    if max_side is not None:
+        cell_size, wall_width, stride = thumbnail_geometry(
+            maze, cell_size, wall_width, max_side)
+    width, height = image_size(maze, cell_size, wall_width)
+    if maze.shape == 'polar':
+        scanlines = iter_polar_scanlines(maze, cell_size, wall_width,
+                                         with_path)
+    else:
+        scanlines = iter_scanlines(maze_rows(maze), maze.cols, maze.rows,
+                                   cell_size, wall_width, with_path)
+    if stride > 1:
+        scanlines = (line[::stride] for py, line in enumerate(scanlines)
+                     if py % stride == 0)
+        width, height = -(-width // stride), -(-height // stride)
+    return scanlines, width, height
+
+
+def render_png(maze: Maze, cell_size: int, wall_width: int,
+               with_path: bool = False,
+               max_side: Optional[int] = None) -> bytes:
+    return b''.join(iter_png(*raster(maze, cell_size, wall_width, with_path,
+                                     max_side)))
+
+
+@functools.lru_cache(maxsize=1)
+def webp_supported() -> bool:
+    """Whether the optional Pillow dependency can write WebP."""
+    try:
+        from PIL import features
+    except ImportError:
+        return False
+    return bool(features.check('webp'))
+
+
+def render_webp(maze: Maze, cell_size: int, wall_width: int,
+                with_path: bool = False,
+                max_side: Optional[int] = None) -> bytes:
+    """Lossless WebP of the raster image; needs Pillow."""
+    from PIL import Image
+    scanlines, width, height = raster(maze, cell_size, wall_width,
+                                      with_path, max_side)
+    image = Image.frombytes('P', (width, height), b''.join(scanlines))
+    image.putpalette([channel for color in PALETTE for channel in color])
+    output = io.BytesIO()
+    image.save(output, 'WEBP', lossless=True, method=4)
+    return output.getvalue()
+
+
+def encode(maze: Maze, image_format: str, cell_size: int, wall_width: int,
+           with_path: bool = False, max_side: Optional[int] = None) -> bytes:
+    """Encode the maze as ``png``, ``webp`` or ``svg``.
+
+    ``max_side`` asks for a thumbnail; SVG scales by itself, so it is
+    always drawn at full size.
+    """
+    if image_format == 'png':
+        return render_png(maze, cell_size, wall_width, with_path, max_side)
+    if image_format == 'webp':
+        return render_webp(maze, cell_size, wall_width, with_path, max_side)
+    if image_format == 'svg':
+        return ''.join(iter_svg(maze, cell_size, wall_width,
+                                with_path)).encode()
+    raise ValueError(f'unsupported image format: {image_format}')
+
+
+def _chords(y: float, inner: float, outer: float):
+    """x intervals where the line at height ``y`` crosses an annulus."""
+    if outer <= abs(y):
+        return ()
+    far = math.sqrt(outer * outer - y * y)
+    if inner <= abs(y):
+        return (-far, far),
+    near = math.sqrt(inner * inner - y * y)
+    return (-far, -near), (near, far)
+
+
+def _angle(x: float, y: float) -> float:
+    angle = math.atan2(y, x)
+    return angle + 2 * math.pi if angle < 0 else angle
+
+
+def _path_dots(maze: Maze, ring_width: int, center: float):
+    """Pixel row -> x intervals of the path markers, as in iter_scanlines."""
+    layout = maze.layout
+    radius = ring_width / 4
+    dots = {}
+    for cell, cell_type in enumerate(maze.cell_types):
+        if cell_type != CellType.PATH:
+            continue
+        ring, position = maze.cords(cell)
+        theta = (position + .5) * 2 * math.pi / layout.counts[ring]
+        distance = (ring + .5) * ring_width if ring else 0
+        cx = distance * math.cos(theta)
+        cy = distance * math.sin(theta)
+        for py in range(math.ceil(cy + center - .5 - radius),
+                        math.floor(cy + center - .5 + radius) + 1):
+            dy = py + .5 - center - cy
+            half = math.sqrt(max(radius * radius - dy * dy, 0))
+            dots.setdefault(py, []).append((cx - half, cx + half))
+    return dots
+
+
+def _arc_extent(near: float, far: float, first: float, last: float):
+    """Vertical extent of the annular sector between two angles."""
+    ys = [radius * math.sin(theta) for radius in (near, far)
+          for theta in (first, last)]
+    for theta in (math.pi / 2, 3 * math.pi / 2):
+        if first <= theta <= last:
+            ys.append(far * math.sin(theta))
+    return min(ys), max(ys)
+
+
+_HAS_INWARD = bytes(bool(mask & INWARD) for mask in range(256))
+_HAS_CLOCKWISE = bytes(bool(mask & CLOCKWISE) for mask in range(256))
+
+
+@functools.lru_cache(maxsize=2)
+def polar_wall_spans(rings: int, ring_width: int, wall_width: int) \
+        -> Tuple[Tuple[array, array, array], ...]:
+    """Pixel spans of every inner wall of a polar maze, row by row.
+
+    Row ``py`` is ``(codes, starts, ends)``: the wall ``codes[i]``, which
+    is ``cell * 4 + bit``, covers the pixels ``starts[i]:ends[i]``. The
+    spans only depend on the geometry, so every maze of one size and
+    scale shares them and drawing a maze only tests its wall bits.
+
+    Every ring but the centre has an even cell count, so the walls are
+    symmetric about both axes: only the lower right quadrant is traced
+    and the other three are its mirror images.
+    """
+    layout = polar_layout(rings)
+    side = polar_side(rings, ring_width, wall_width)
+    center = side / 2
+    middle = side // 2
+    half = wall_width / 2
+    ceil, floor, sqrt, sin, cos = (math.ceil, math.floor, math.sqrt,
+                                   math.sin, math.cos)
+    # Pixel x = ceil(x + offset) .. floor(x + offset) for a span [x, x].
+    offset = center - .5
+    pixel = 'H' if side <= 0xFFFF else 'i'
+    quadrant = [(array('i'), array(pixel), array(pixel))
+                for _ in range(middle)]
+
+    def add(py: int, code: int, xa: float, xb: float):
+        start = ceil(xa + offset)
+        end = floor(xb + offset) + 1
+        if start < middle:
+            start = middle
+        if end > side:
+            end = side
+        if start < end:
+            codes, starts, ends = quadrant[py - middle]
+            codes.append(code)
+            starts.append(start)
+            ends.append(end)
+
+    def cot(theta: float) -> float:
+        sine = sin(theta)
+        if abs(sine) < 1e-12:
+            return math.inf if cos(theta) > 0 else -math.inf
+        return cos(theta) / sine
+
+    def arc(code: int, near: float, first: float, last: float):
+        inner, outer = near - half, near + half
+        # Each cell's angles lie entirely above or below the centre.
+        cosine = cos(first)
+        if first >= math.pi or (outer if cosine > 0 else inner) * cosine < 0:
+            return
+        inner2, outer2 = inner * inner, outer * outer
+        cot_first, cot_last = cot(first), cot(last)
+        finite = (cot_first not in (math.inf, -math.inf),
+                  cot_last not in (math.inf, -math.inf))
+        y_min, y_max = _arc_extent(inner, outer, first, last)
+        for py in range(max(ceil(y_min + offset), middle),
+                        min(floor(y_max + offset), side - 1) + 1):
+            y = py + .5 - center
+            y2 = y * y
+            if outer2 <= y2:
+                continue
+            # Below the centre x falls as the angle grows; infinite
+            # cotangents stand for the horizontal axis.
+            x1 = cot_first * y if finite[0] else cot_first
+            x0 = cot_last * y if finite[1] else cot_last
+            far = sqrt(outer2 - y2)
+            close = sqrt(inner2 - y2) if inner2 > y2 else 0.0
+            if x1 > close:
+                add(py, code, x0 if x0 > close else close,
+                    x1 if x1 < far else far)
+
+    def radial(code: int, near: float, theta: float):
+        sine, cosine = sin(theta), cos(theta)
+        far = near + ring_width
+        if max(near * cosine, far * cosine) + half * abs(sine) < 0:
+            return
+        ys = [t * sine + s * cosine for t in (near, far)
+              for s in (-half, half)]
+        top = max(ceil(min(ys) + offset), middle)
+        bottom = min(floor(max(ys) + offset), side - 1)
+        if -1e-9 < sine < 1e-9:
+            xa, xb = sorted((near * cosine, far * cosine))
+            for py in range(top, bottom + 1):
+                if py + .5 - center <= half:
+                    add(py, code, xa, xb)
+            return
+        for py in range(top, bottom + 1):
+            y = py + .5 - center
+            # Points of the segment are t * (cos, sin) + s * (-sin, cos)
+            # with near <= t <= far and |s| <= half; solve for s.
+            if -1e-9 < cosine < 1e-9:
+                if not near <= y / sine <= far:
+                    continue
+                low, high = -half, half
+            else:
+                low = (y - near * sine) / cosine
+                high = (y - far * sine) / cosine
+                if low > high:
+                    low, high = high, low
+                if low < -half:
+                    low = -half
+                if high > half:
+                    high = half
+                if low > high:
+                    continue
+            base = y * cosine / sine
+            xa, xb = base - low / sine, base - high / sine
+            if xa > xb:
+                xa, xb = xb, xa
+            add(py, code, xa, xb)
+
+    tau = 2 * math.pi
+    # Mirrored in the horizontal axis the arc of position p becomes that
+    # of count - 1 - p and the ray clockwise of p the one of count - 2 - p;
+    # in the vertical axis they become those of count / 2 - 1 - p and
+    # count / 2 - 2 - p.
+    flip_y = array('i', bytes(4 * 4 * layout.size))
+    flip_x = array('i', flip_y)
+    for ring in range(1, rings):
+        count = layout.counts[ring]
+        step = tau / count
+        near = ring * ring_width
+        start = layout.starts[ring]
+        for position in range(count):
+            code = (start + position) * 4
+            flip_y[code + INWARD] = \
+                (start + count - 1 - position) * 4 + INWARD
+            flip_y[code + CLOCKWISE] = \
+                (start + (count - 2 - position) % count) * 4 + CLOCKWISE
+            flip_x[code + INWARD] = \
+                (start + (count // 2 - 1 - position) % count) * 4 + INWARD
+            flip_x[code + CLOCKWISE] = \
+                (start + (count // 2 - 2 - position) % count) * 4 + CLOCKWISE
+            first = position * step
+            arc(code + INWARD, near, first, first + step)
+            radial(code + CLOCKWISE, near, (position + 1) * step)
+    below = []
+    for codes, starts, ends in quadrant:
+        below.append((codes + array('i', map(flip_x.__getitem__, codes)),
+                      starts + array(pixel, [side - end for end in ends]),
+                      ends + array(pixel, [side - start for start in starts])))
+    above = [(array('i', map(flip_y.__getitem__, codes)), starts, ends)
+             for codes, starts, ends in reversed(below)]
+    return tuple(above + below)
+
+
+def iter_polar_scanlines(maze: Maze, ring_width: int, wall_width: int,
+                         with_path: bool = False) -> Iterator[bytes]:
+    """Yield the palette-indexed pixel rows of a polar maze image.
+
+    The inner walls come from ``polar_wall_spans``; each row paints the
+    spans of the walls the maze has.
+    """
+    rings = maze.rings
+    walls = bytes(maze.walls)
+    side = polar_side(rings, ring_width, wall_width)
+    center = side / 2
+    half = wall_width / 2
+    outer = rings * ring_width
+    solid = [bytes([color]) * side for color in range(4)]
+    wall_span = solid[WALL]
+    dots = _path_dots(maze, ring_width, center) if with_path else {}
+    spans = polar_wall_spans(rings, ring_width, wall_width) \
+        if wall_width > 0 else ()
+    # present[cell * 4 + bit] tells whether the cell has that wall.
+    present = bytearray(4 * len(walls))
+    present[INWARD::4] = walls.translate(_HAS_INWARD)
+    present[CLOCKWISE::4] = walls.translate(_HAS_CLOCKWISE)
+    ceil, floor = math.ceil, math.floor
+    offset = center - .5
+
+    def paint(line: bytearray, xa: float, xb: float, color: int):
+        start = max(ceil(xa + offset), 0)
+        end = min(floor(xb + offset) + 1, side)
+        if start < end:
+            line[start:end] = solid[color][:end - start]
+
+    for py in range(side):
+        y = py + .5 - center
+        line = bytearray(solid[BACKGROUND])
+        for xa, xb in _chords(y, 0, outer):
+            paint(line, xa, xb, FLOOR)
+        for xa, xb in dots.get(py, ()):
+            paint(line, xa, xb, PATH)
+        if wall_width > 0:
+            for xa, xb in _chords(y, outer - half, outer + half):
+                paint(line, xa, xb, WALL)
+            for code, start, end in zip(*spans[py]):
+                if present[code]:
+                    line[start:end] = wall_span[:end - start]
+        yield bytes(line)
+
+
+COLORS = ('#808080', 'darkgreen', 'black', 'blue')
+
+
+def iter_svg(maze: Maze, cell_size: int, wall_width: int,
+             with_path: bool = False) -> Iterator[str]:
+    """Stream an SVG document of the maze, one element at a time.
+
+    Floor cells are merged into one path per row and collinear wall
+    segments into long strokes, one path per grid line.
+    """
+    if maze.shape == 'polar':
+        yield from iter_polar_svg(maze, cell_size, wall_width, with_path)
+        return
+    width, height = image_size(maze, cell_size, wall_width)
+    cols, rows = maze.cols, maze.rows
+    walls, valid, cell_types = maze.walls, maze.valid, maze.cell_types
+    exists = valid if valid is not None else b'\x01' * (cols * rows)
+    yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+           f'height="{height}" viewBox="0 0 {width} {height}">\n'
+           f'<rect width="100%" height="100%" fill="{COLORS[BACKGROUND]}"/>\n')
+
+    for y in range(rows):
+        row = exists[y * cols:(y + 1) * cols]
+        d = ''.join(f'M{start * cell_size} {y * cell_size}'
+                    f'h{(end - start) * cell_size}v{cell_size}'
+                    f'h-{(end - start) * cell_size}z'
+                    for start, end in _runs(row, 0, cols))
+        if d:
+            yield f'<path fill="{COLORS[FLOOR]}" d="{d}"/>\n'
+
+    if with_path:
+        radius = cell_size / 4
+        for y in range(rows):
+            dots = ''.join(
+                f'<circle cx="{(x + .5) * cell_size:g}" '
+                f'cy="{(y + .5) * cell_size:g}" r="{radius:g}"/>'
+                for x in range(cols)
+                if cell_types[y * cols + x] == CellType.PATH)
+            if dots:
+                yield f'<g fill="{COLORS[PATH]}">{dots}</g>\n'
+
+    if wall_width <= 0:
+        yield '</svg>\n'
+        return
+    yield (f'<g stroke="{COLORS[WALL]}" stroke-width="{wall_width}" '
+           f'stroke-linecap="square" fill="none">\n')
+    for k in range(rows + 1):
+        flags = bytearray(cols)
+        for x in range(cols):
+            above, below = (k - 1) * cols + x, k * cols + x
+            if k < rows and exists[below] and walls[below] & TOP or \
+                    k > 0 and exists[above] and walls[above] & BOTTOM:
+                flags[x] = 1
+        py = k * cell_size
+        d = ''.join(f'M{start * cell_size} {py}H{end * cell_size}'
+                    for start, end in _runs(flags, 0, cols))
+        if d:
+            yield f'<path d="{d}"/>\n'
+    for k in range(cols + 1):
+        flags = bytearray(rows)
+        for y in range(rows):
+            left, right = y * cols + k - 1, y * cols + k
+            if k < cols and exists[right] and walls[right] & LEFT or \
+                    k > 0 and exists[left] and walls[left] & RIGHT:
+                flags[y] = 1
+        px = k * cell_size
+        d = ''.join(f'M{px} {start * cell_size}V{end * cell_size}'
+                    for start, end in _runs(flags, 0, rows))
+        if d:
+            yield f'<path d="{d}"/>\n'
+    yield '</g>\n</svg>\n'
+
+
+def render_region_png(maze: Maze, cell_size: int, wall_width: int,
+                      x0: int, y0: int, width: int, height: int,
+                      with_path: bool = False) -> bytes:
+    """Render only the given pixel window of the full maze image."""
+    scanlines = iter_scanlines(maze_rows(maze), maze.cols, maze.rows,
+                               cell_size, wall_width, with_path,
+                               x0, y0, width, height)
+    return b''.join(iter_png(scanlines, width, height))
+
+
+def iter_polar_svg(maze: Maze, ring_width: int, wall_width: int,
+                   with_path: bool = False) -> Iterator[str]:
+    """Stream an SVG document of a polar maze.
+
+    Neighbouring inward walls of a ring are merged into one arc and a
+    ring closed all the way round becomes a circle.
+    """
+    layout = maze.layout
+    side = polar_side(maze.rings, ring_width, wall_width)
+    center = side / 2
+    outer = maze.rings * ring_width
+    walls = maze.walls
+    tau = 2 * math.pi
+
+    def point(distance: float, theta: float) -> str:
+        return (f'{center + distance * math.cos(theta):.2f} '
+                f'{center + distance * math.sin(theta):.2f}')
+
+    yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{side}" '
+           f'height="{side}" viewBox="0 0 {side} {side}">\n'
+           f'<rect width="100%" height="100%" fill="{COLORS[BACKGROUND]}"/>\n'
+           f'<circle cx="{center:g}" cy="{center:g}" r="{outer}" '
+           f'fill="{COLORS[FLOOR]}"/>\n')
+
+    if with_path:
+        radius = ring_width / 4
+        dots = []
+        for cell in maze.path:
+            ring, position = maze.cords(cell)
+            if maze.cell_types[cell] != CellType.PATH:
+                continue
+            theta = (position + .5) * tau / layout.counts[ring]
+            x, y = point((ring + .5) * ring_width if ring else 0,
+                         theta).split()
+            dots.append(f'<circle cx="{x}" cy="{y}" r="{radius:g}"/>')
+        if dots:
+            yield f'<g fill="{COLORS[PATH]}">{"".join(dots)}</g>\n'
+
+    if wall_width <= 0:
+        yield '</svg>\n'
+        return
+    yield (f'<g stroke="{COLORS[WALL]}" stroke-width="{wall_width}" '
+           f'fill="none">\n'
+           f'<circle cx="{center:g}" cy="{center:g}" r="{outer}"/>\n')
+    for ring in range(1, maze.rings):
+        count, start = layout.counts[ring], layout.starts[ring]
+        step = tau / count
+        near, far = ring * ring_width, (ring + 1) * ring_width
+        flags = bytes(walls[start + position] & INWARD
+                      for position in range(count))
+        if all(flags):
+            yield f'<circle cx="{center:g}" cy="{center:g}" r="{near}"/>\n'
+            arcs = ''
+        else:
+            arcs = ''.join(
+                f'M{point(near, first * step)}'
+                f'A{near} {near} 0 {int((last - first) * step > math.pi)} 1 '
+                f'{point(near, last * step)}'
+                for first, last in _runs(flags, 0, count))
+        lines = ''.join(
+            f'M{point(near, (position + 1) * step)}'
+            f'L{point(far, (position + 1) * step)}'
+            for position in range(count)
+            if walls[start + position] & CLOCKWISE)
+        if arcs or lines:
+            yield f'<path d="{arcs}{lines}"/>\n'
+    yield '</g>\n</svg>\n'
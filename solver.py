@@ -0,0 +1,88 @@
+from array import array
+from collections import deque
+from typing import List, Optional
+
+from Maze import Maze
+
+
+class MazeSolver:
+    """Spanning tree of a perfect maze with parent pointers and depths.
+
+    The tree is built once by a BFS from ``root``; afterwards the path
+    between any two cells is found by walking both ends up to their
+    lowest common ancestor, in time proportional to the path length.
+    """
+
+    def __init__(self, maze: Maze, root: Optional[int] = None):
+        if root is None:
+            root = maze.index(maze.entrance)
+        self.root = root
+        size = len(maze.walls)
+        self.parent = array('i', [-1]) * size
+        self.depth = array('i', [-1]) * size
+        if hasattr(maze, 'passages'):
+            self._build_graph(maze)
+        else:
+            self._build(maze)
+
+    def _build_graph(self, maze: Maze):
+        """BFS for mazes that are not a grid and list their own passages."""
+        passages = maze.passages
+        parent = self.parent
+        depth = self.depth
+        depth[self.root] = 0
+        queue = deque([self.root])
+        while queue:
+            cell = queue.popleft()
+            next_depth = depth[cell] + 1
+            for next_cell in passages(cell):
+                if depth[next_cell] < 0:
+                    parent[next_cell] = cell
+                    depth[next_cell] = next_depth
+                    queue.append(next_cell)
+
+    def _build(self, maze: Maze):
+        walls = maze.walls
+        # Open directions that lead to another cell, as index offsets.
+        links = maze.adjacency.links
+        steps = maze.adjacency.steps
+        parent = self.parent
+        depth = self.depth
+        depth[self.root] = 0
+        queue = deque([self.root])
+        pop = queue.popleft
+        push = queue.append
+        while queue:
+            cell = pop()
+            next_depth = depth[cell] + 1
+            for offset in steps[links[cell] & ~walls[cell]]:
+                next_cell = cell + offset
+                if depth[next_cell] < 0:
+                    parent[next_cell] = cell
+                    depth[next_cell] = next_depth
+                    push(next_cell)
+
+    def path(self, start: int, end: int) -> List[int]:
+        """Cells from ``start`` to ``end`` inclusive."""
+        parent = self.parent
+        depth = self.depth
+        if depth[start] < 0 or depth[end] < 0:
+            raise ValueError('cells are not connected')
+        head, tail = [], []
+        while depth[start] > depth[end]:
+            head.append(start)
+            start = parent[start]
+        while depth[end] > depth[start]:
+            tail.append(end)
+            end = parent[end]
+        while start != end:
+            head.append(start)
+            tail.append(end)
+            start = parent[start]
+            end = parent[end]
+        head.append(start)
+        tail.reverse()
+        return head + tail
+
+    def distance(self, start: int, end: int) -> int:
+        return len(self.path(start, end)) - 1
@@ -0,0 +1,118 @@
+"""Binary maze saves.
+
+A save is a fixed little-endian header followed by the raw wall mask of
+every grid slot, one byte per cell in row-major order. The mask block
+can be mapped straight into ``Maze.walls`` without parsing or copying.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Optional, Tuple
+
+from Maze import Cell, CellType, Maze
+
+MAGIC = b'WMZB'
+VERSION = 1
+SHAPES = ('rectangular', 'circular', 'polar')
+NO_SEED = -1
+# magic, version, shape, first/second shape parameter, cols, rows,
+# entrance x/y, exit x/y (-1 when unset), cell_size, wall_width, reserved,
+# seed
+HEADER = struct.Struct('<4sHH4I4i3Iq')
+
+
+def pack_header(maze: Maze, cell_size: int, wall_width: int) -> bytes:
+    return pack_header_fields(maze.shape, maze.params, maze.cols, maze.rows,
+                              maze.entrance, maze.exit, cell_size,
+                              wall_width, maze.seed)
+
+
+def pack_header_fields(shape: str, params, cols: int, rows: int,
+                       entrance: Tuple[int, int],
+                       exit_cords: Optional[Tuple[int, int]],
+                       cell_size: int, wall_width: int,
+                       seed: Optional[int]) -> bytes:
+    params = tuple(params) + (0,) * (2 - len(params))
+    if exit_cords is None:
+        exit_cords = (-1, -1)
+    if seed is None:
+        seed = NO_SEED
+    return HEADER.pack(MAGIC, VERSION, SHAPES.index(shape), *params,
+                       cols, rows, *entrance, *exit_cords,
+                       cell_size, wall_width, 0, seed)
+
+
+def save_binary(maze: Maze, path: str, cell_size: int, wall_width: int):
+    """Write the save to a temporary file and move it over ``path``.
+
+    The mask is copied first: a maze loaded from ``path`` maps that
+    very file, which must stay intact until the new save replaces it.
+    """
+    header = pack_header(maze, cell_size, wall_width)
+    walls = bytes(maze.walls)
+    with open(path + '.tmp', 'wb') as file:
+        file.write(header)
+        file.write(walls)
+    os.replace(path + '.tmp', path)
+
+
+def load_binary(path: str, copy: bool = False) -> Tuple[Maze, int, int]:
+    """Load a binary save and return ``(maze, cell_size, wall_width)``.
+
+    Unless ``copy`` is set the wall masks stay a copy-on-write memory map
+    of the file, so loading does not read the mask block at all.
+    """
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    (magic, version, shape, first, second, cols, rows, entrance_x,
+     entrance_y, exit_x, exit_y, cell_size, wall_width, _, seed) \
+        = HEADER.unpack_from(mapping)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} maze save')
+    maze = Maze.create(SHAPES[shape], (first, second), None
+                       if seed == NO_SEED else seed)
+    if (maze.cols, maze.rows) != (cols, rows) or \
+            len(mapping) != HEADER.size + cols * rows:
+        raise ValueError(f'{path} is truncated or corrupted')
+    walls = memoryview(mapping)[HEADER.size:]
+    maze.walls = bytearray(walls) if copy else walls
+    maze.set_enter((entrance_x, entrance_y))
+    if exit_x >= 0:
+        maze.set_exit((exit_x, exit_y))
+    return maze, cell_size, wall_width
+
+
+def load_json_save(path: str) -> Tuple[Maze, int, int]:
+    """Read a save written by the old line-based JSON format."""
+    with open(path, 'r') as file:
+        maze_properties = json.loads(file.readline())
+        (e_cells, entrance, exit_cords, cell_size, wall_width) \
+            = json.loads(file.readline())
+    maze = Maze.create(maze_properties[0], maze_properties[1:])
+    for e_cell in e_cells.values():
+        Cell.decode_cell(maze, e_cell)
+    # Old saves stored the solved path in the cell types, but the path
+    # list is not saved; drop the marks so the next solve starts clean.
+    cell_types = maze.cell_types
+    for index, cell_type in enumerate(cell_types):
+        if cell_type == CellType.PATH:
+            cell_types[index] = CellType.REGULAR
+    maze.entrance = tuple(entrance)
+    if exit_cords is not None:
+        maze.exit = tuple(exit_cords)
+    return maze, cell_size, wall_width
+
+
+def convert_json_save(json_path: str, binary_path: Optional[str] = None):
+    if binary_path is None:
+        binary_path = json_path.rsplit('.', 1)[0] + '.maze'
+    maze, cell_size, wall_width = load_json_save(json_path)
+    save_binary(maze, binary_path, cell_size, wall_width)
+    return binary_path
+
+
+if __name__ == '__main__':
+    for json_save in sys.argv[1:]:
+        print(convert_json_save(json_save))
@@ -0,0 +1,170 @@
+"""Row-streaming generation for rectangular mazes of unbounded length.
+
+Rows come out of Eller's algorithm one at a time and are written as
+binary save records while they are produced, so the Python heap only
+ever holds O(width) maze state. Solving walks the finished save through
+a memory map and records the path in a second, temporary map; the PNG
+is then rendered scanline by scanline from both maps. For the same seed
+every output is byte-identical to generating ``RectMaze(length, width,
+seed)`` with the ``Eller`` algorithm in memory.
+
+Example::
+
+    python streaming.py scroll.maze --length 10000 --width 100000 \\
+        --seed 7 --png scroll.png --exit 9999 99999 --with-path
+"""
+import argparse
+import mmap
+import random
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+import storage
+from Maze import ALL_WALLS, CellType, Directions, WALL_BITS
+from algorithms import eller_rows
+from metrics import REGISTRY
+from render import RowData, iter_png, iter_scanlines
+
+TOP = WALL_BITS[Directions.TOP]
+RIGHT = WALL_BITS[Directions.RIGHT]
+BOTTOM = WALL_BITS[Directions.BOTTOM]
+LEFT = WALL_BITS[Directions.LEFT]
+
+
+def iter_wall_rows(length: int, width: int, seed: Optional[int]) \
+        -> Iterator[bytearray]:
+    """Yield the wall masks of a ``length`` x ``width`` maze row by row."""
+    above = bytearray(length)
+    for right, down in eller_rows(length, width, random.Random(seed)):
+        row = bytearray(length)
+        for x in range(length):
+            mask = ALL_WALLS
+            if above[x]:
+                mask &= ~TOP
+            if down[x]:
+                mask &= ~BOTTOM
+            if right[x]:
+                mask &= ~RIGHT
+            if x and right[x - 1]:
+                mask &= ~LEFT
+            row[x] = mask
+        yield row
+        above = down
+
+
+def write_save(path: str, length: int, width: int, seed: Optional[int],
+               cell_size: int = 10, wall_width: int = 2,
+               exit_cords: Optional[Tuple[int, int]] = None) -> str:
+    """Generate the maze straight into a binary save at ``path``."""
+    with open(path, 'wb') as file:
+        file.write(storage.pack_header_fields(
+            'rectangular', (length, width), length, width, (0, 0),
+            exit_cords, cell_size, wall_width, seed))
+        for row in iter_wall_rows(length, width, seed):
+            file.write(row)
+    return path
+
+
+def solve_save(walls, cols: int, start: int, end: int, on_path):
+    """Mark the cells between ``start`` and ``end`` in ``on_path``.
+
+    Follows the right-hand wall, which walks a perfect maze as an Euler
+    tour of its spanning tree: stepping into a marked cell means the
+    walk is backing out of the current one, so that one is unmarked.
+    Only O(1) state lives outside the two buffers.
+    """
+    offsets = (-cols, 1, cols, -1)
+    bits = (TOP, RIGHT, BOTTOM, LEFT)
+    cell, heading = start, Directions.RIGHT
+    on_path[cell] = 1
+    while cell != end:
+        mask = walls[cell]
+        for turn in (1, 0, 3, 2):
+            direction = (heading + turn) % 4
+            if not mask & bits[direction]:
+                break
+        next_cell = cell + offsets[direction]
+        if on_path[next_cell]:
+            on_path[cell] = 0
+        else:
+            on_path[next_cell] = 1
+        cell, heading = next_cell, direction
+
+
+def _temporary_map(size: int):
+    file = tempfile.TemporaryFile()
+    file.truncate(max(size, 1))
+    return file, mmap.mmap(file.fileno(), max(size, 1))
+
+
+def iter_png_from_save(save_path: str, with_path: bool = False) \
+        -> Iterator[bytes]:
+    """Stream a PNG of a binary save, solving it first if asked to."""
+    with open(save_path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    (_, _, _, _, _, cols, rows, entrance_x, entrance_y, exit_x, exit_y,
+     cell_size, wall_width, _, _) = storage.HEADER.unpack_from(mapping)
+    walls = memoryview(mapping)[storage.HEADER.size:]
+    entrance = entrance_y * cols + entrance_x
+    exit_cell = exit_y * cols + exit_x if exit_x >= 0 else None
+    path_file = None
+    on_path = None
+    if with_path and exit_cell is not None:
+        path_file, on_path = _temporary_map(cols * rows)
+        with REGISTRY.stage('solve'):
+            solve_save(walls, cols, entrance, exit_cell, on_path)
+    types = bytes([CellType.REGULAR, CellType.PATH]) + bytes(254)
+
+    def row(y: int) -> RowData:
+        start, end = y * cols, (y + 1) * cols
+        if on_path is None:
+            cell_types = bytearray(cols)
+        else:
+            cell_types = bytearray(on_path[start:end].translate(types))
+        for cell, cell_type in ((entrance, CellType.IN),
+                                (exit_cell, CellType.OUT)):
+            if cell is not None and start <= cell < end:
+                cell_types[cell - start] = cell_type
+        return walls[start:end], None, cell_types
+
+    width = cols * cell_size + wall_width // 2
+    height = rows * cell_size + wall_width // 2
+    try:
+        yield from iter_png(iter_scanlines(row, cols, rows, cell_size,
+                                           wall_width, with_path),
+                            width, height)
+    finally:
+        if on_path is not None:
+            on_path.close()
+            path_file.close()
+
+
+def write_png(png_path: str, save_path: str, with_path: bool = False) -> int:
+    written = 0
+    with open(png_path, 'wb') as file:
+        for chunk in iter_png_from_save(save_path, with_path):
+            written += file.write(chunk)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('save', help='binary save to write')
+    parser.add_argument('--length', type=int, required=True)
+    parser.add_argument('--width', type=int, required=True)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--cell-size', type=int, default=10)
+    parser.add_argument('--wall-width', type=int, default=2)
+    parser.add_argument('--exit', type=int, nargs=2, metavar=('X', 'Y'))
+    parser.add_argument('--png', help='also stream a PNG to this path')
+    parser.add_argument('--with-path', action='store_true')
+    args = parser.parse_args(argv)
+    write_save(args.save, args.length, args.width, args.seed,
+               args.cell_size, args.wall_width,
+               tuple(args.exit) if args.exit else None)
+    if args.png:
+        write_png(args.png, args.save, args.with_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""pygame window for the interactive generator.
+
+This is the only module that imports pygame; the maze model, the
+generators and the web service never load it.
+"""
+from itertools import islice
+from typing import Iterator, Optional, Tuple
+
+import pygame
+
+from Maze import Cell, CellType, Directions
+
+
+def open_window(gen, flags: Optional[int] = None):
+    """Initialise pygame once and size the window to ``gen.maze``."""
+    if not pygame.get_init():
+        pygame.init()
+    if gen.clock is None:
+        gen.clock = pygame.time.Clock()
+    if flags is None:
+        flags = pygame.HIDDEN if gen.hidden else 0
+    maze = gen.maze
+    gen.screen = pygame.display.set_mode(
+        (maze.cols * gen.cell_size, maze.rows * gen.cell_size), flags=flags)
+    maze.dirty_all = True
+
+
+def animate_steps(gen, steps: Iterator[Tuple[int, int]]) -> int:
+    """Draw a carving iterator as it runs and return the carved pair count.
+
+    ``gen.fps`` is the number of carving steps per second; steps are
+    drawn in batches so the screen is updated at most 60 times a second.
+    """
+    count = 0
+    speed = max(gen.fps, 1)
+    frame_rate = min(speed, 60)
+    batch = -(-speed // frame_rate)
+    maze = gen.maze
+    while True:
+        carved = list(islice(steps, batch))
+        if not carved:
+            break
+        count += len(carved)
+        for first, second in carved:
+            maze.dirty.add(first)
+            maze.dirty.add(second)
+        draw_dirty(gen)
+        gen.clock.tick(frame_rate)
+    return count
+
+
+def run(gen):
+    from Generator import init_maze
+    while gen.running:
+        draw_dirty(gen)
+        for event in pygame.event.get():
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_p:
+                    gen.with_path = True
+                    gen.maze.mark_dirty(gen.maze.path)
+                if event.key == pygame.K_l:
+                    gen.with_path = False
+                    gen.maze.mark_dirty(gen.maze.path)
+                if event.key == pygame.K_r and not gen.is_loaded:
+                    gen.screen.fill('grey')
+                    init_maze(gen)
+                if event.key == pygame.K_s:
+                    file_name = input('File name: ')
+                    gen.maze.save_maze(file_name, gen)
+                if event.key == pygame.K_e:
+                    set_entrance_with_mouse(gen)
+                if event.key == pygame.K_x:
+                    set_exit_with_mouse(gen)
+                if event.key == pygame.K_ESCAPE:
+                    gen.running = False
+            if event.type == pygame.QUIT:
+                gen.running = False
+
+        gen.clock.tick(20)
+
+
+def draw_maze(gen):
+    for cell in gen.maze.cells.values():
+        draw_cell(cell, gen)
+
+
+def draw_dirty(gen):
+    """Redraw the cells changed since the last call and push only their rects."""
+    maze = gen.maze
+    if maze.dirty_all:
+        draw_maze(gen)
+        pygame.display.flip()
+    elif maze.dirty:
+        cols = maze.cols
+        cell_size = gen.cell_size
+        margin = gen.wall_width
+        rects = []
+        for index in sorted(maze.dirty, key=lambda cell: (cell % cols, cell)):
+            x, y = maze.cords(index)
+            draw_cell(Cell(maze, x, y), gen)
+            rects.append((x * cell_size - margin, y * cell_size - margin,
+                          cell_size + 2 * margin, cell_size + 2 * margin))
+        pygame.display.update(rects)
+    maze.dirty.clear()
+    maze.dirty_all = False
+
+
+def draw_cell(cell: Cell, gen, x0: int = 0, y0: int = 0):
+    cell_size = gen.cell_size
+    wall_width = gen.wall_width
+    screen = gen.screen
+    x, y = x0 + cell.x * cell_size, y0 + cell.y * cell_size
+    # if cell.visited == 1:
+    pygame.draw.rect(screen, 'darkgreen', (x, y, cell_size, cell_size))
+    if gen.with_path:
+        if cell.cell_type == CellType.PATH:
+            pygame.draw.circle(screen, 'blue', (x + cell_size / 2, y + cell_size / 2), cell_size / 4)
+    # if cell.cell_type == CellType.IN:
+    #     pygame.draw.circle(screen, 'orange', (x + cell_size/2, y + cell_size/2), cell_size/2.7)
+    # if cell.cell_type == CellType.OUT:
+    #     pygame.draw.circle(screen, 'red', (x + cell_size/2, y + cell_size/2), cell_size/2.7)
+
+    if cell.walls[Directions.TOP]:
+        pygame.draw.line(screen, 'black', (x, y), (x + cell_size, y), wall_width)
+    if cell.walls[Directions.BOTTOM]:
+        pygame.draw.line(screen, 'black', (x, y + cell_size), (x + cell_size, y + cell_size), wall_width)
+    if cell.walls[Directions.LEFT]:
+        pygame.draw.line(screen, 'black', (x, y), (x, y + cell_size), wall_width)
+    if cell.walls[Directions.RIGHT]:
+        pygame.draw.line(screen, 'black', (x + cell_size, y), (x + cell_size, y + cell_size), wall_width)
+
+
+def set_entrance_with_mouse(gen):
+    x, y = pygame.mouse.get_pos()
+    x //= gen.cell_size
+    y //= gen.cell_size
+    if (x, y) in gen.maze.cells:
+        gen.maze.reset_cells_path()
+        gen.maze.set_enter((x, y))
+        gen.maze.calculate_path()
+
+
+def set_exit_with_mouse(gen):
+    x, y = pygame.mouse.get_pos()
+    x //= gen.cell_size
+    y //= gen.cell_size
+    if (x, y) in gen.maze.cells.keys():
+        gen.maze.reset_cells_path()
+        gen.maze.set_exit((x, y))
+        gen.maze.calculate_path()